@@ -0,0 +1,255 @@
+"""
+Benchmarks of the wordclock's hot paths, running on plain linux (without any wordclock hardware).
+
+Run
+    python3 benchmark.py -o results.json
+to save the results and
+    python3 benchmark.py -o new.json -c results.json
+to compare them against previous results (exits with 1, if any benchmark regressed).
+"""
+
+import configparser
+import datetime
+import getopt
+import glob
+import importlib
+import inspect
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+
+import wordclock_interfaces.event_handler as wci
+import wordclock_tools.wiring as wiring
+import wordclock_tools.wordclock_colors as wcc
+import wordclock_tools.wordclock_display as wordclock_display
+
+BASE_PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+class benchmark_event_handler(wci.event_handler):
+    """
+    Event handler, which never waits: Plugins and display functions run at full speed
+    """
+
+    def waitForExit(self, seconds=None):
+        return False
+
+
+def create_config(**options):
+    """
+    Creates the configuration from the reference config to run headless and synchronously.
+    Further options are passed as section__option=value
+    """
+    config = configparser.ConfigParser()
+    config.read(os.path.join(BASE_PATH, 'wordclock_config', 'wordclock_config.reference.cfg'))
+    config.set('wordclock', 'base_path', BASE_PATH)
+    config.set('wordclock', 'show_startup_message', 'False')
+    config.set('wordclock', 'developer_mode', 'False')
+    config.set('wordclock', 'headless', 'True')
+    config.set('wordclock', 'headless_recording', '')
+    config.set('wordclock', 'render_thread', 'False')
+    for key, value in options.items():
+        section, option = key.split('__')
+        config.set(section, option, str(value))
+    return config
+
+
+def create_display(config=None):
+    display = wordclock_display.wordclock_display(config or create_config(), benchmark_event_handler())
+    # Measure the computation of each frame only, not the pacing to the configured fps
+    display.renderer.renderAtDeadline = lambda screen, duration: display.render_transition_step(screen)
+    return display
+
+
+def measure(function, repeats, setup=None):
+    """
+    Returns statistics on the duration of the given function (in milliseconds)
+    setup: Called (untimed) before each run, e.g. to clear caches for measuring cold runs
+    """
+    if setup is not None:
+        setup()
+    function()  # Warm up (e.g. to fill caches)
+    durations = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        durations.append(1000.0 * (time.perf_counter() - start))
+    return {'min_ms': min(durations), 'median_ms': statistics.median(durations), 'repeats': repeats}
+
+
+def show_time(display, time, animation=None):
+    display.setColorToAll(wcc.BLACK, includeMinutes=True)
+    display.setColorBy1DCoordinates(display.taw.get_time(time, True), wcc.WWHITE)
+    display.setMinutes(time, wcc.WWHITE)
+    display.show(animation)
+
+
+def benchmark_show(display, repeats):
+    results = {}
+    times = [datetime.datetime(2020, 1, 1, 12, 0), datetime.datetime(2020, 1, 1, 12, 7)]
+    for animation in [None] + sorted(display.renderer.transitions):
+        state = {'toggle': 0}
+
+        def run():
+            state['toggle'] ^= 1
+            show_time(display, times[state['toggle']], animation)
+
+        results['show/' + (animation or 'none')] = measure(run, repeats)
+    return results
+
+
+def benchmark_text(display, repeats):
+    results = {}
+    for text in ['12:34', 'IP: 192.168.178.100']:
+        frames = display.frames_rendered + display.frames_skipped
+        result = measure(lambda: display.showText(text), repeats)
+        result['frames'] = (display.frames_rendered + display.frames_skipped - frames) // (repeats + 1)
+        results['showText/' + text] = result
+    return results
+
+
+def benchmark_images(display, repeats):
+    results = {}
+
+    def clear_caches():
+        display.image_cache.clear()
+        display.animation_cache.clear()
+
+    icons = sorted(glob.glob(os.path.join(BASE_PATH, 'icons', display.dispRes(), '*.png')) +
+                   glob.glob(os.path.join(BASE_PATH, 'wordclock_plugins', '*', 'icons', display.dispRes(), '*.png')))
+    results['setImage/all_icons'] = measure(lambda: [display.setImage(icon) for icon in icons], repeats)
+    results['setImage/all_icons']['images'] = len(icons)
+    # Cold: Decoding each image file, as on a miss of the image cache (and the icon atlas)
+    results['decodeImage/all_icons'] = measure(lambda: [display.decodeImage(icon) for icon in icons], repeats)
+    results['decodeImage/all_icons']['images'] = len(icons)
+
+    for animation_dir in sorted(glob.glob(os.path.join(BASE_PATH, 'wordclock_plugins', '*', 'animations',
+                                                       display.dispRes(), '*', ''))):
+        plugin = animation_dir.split(os.sep)[-5]
+        animation = animation_dir.split(os.sep)[-2]
+        results['animate/' + plugin + '/' + animation] = measure(
+            lambda: display.animate(plugin, animation, fps=1000), repeats)
+        results['animate_cold/' + plugin + '/' + animation] = measure(
+            lambda: display.animate(plugin, animation, fps=1000), repeats, setup=clear_caches)
+    return results
+
+
+def benchmark_languages(repeats):
+    results = {}
+    one_day = [datetime.datetime(2020, 1, 1) + datetime.timedelta(minutes=m) for m in range(24 * 60)]
+    for path in sorted(glob.glob(os.path.join(BASE_PATH, 'wordclock_plugins', 'time_default', 'time_*.py'))):
+        module_name = os.path.splitext(os.path.basename(path))[0]
+        module = importlib.import_module('wordclock_plugins.time_default.' + module_name)
+        for _, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ == module.__name__ and hasattr(cls, 'get_time'):
+                try:
+                    taw = cls()
+                    results['get_time/' + module_name] = measure(
+                        lambda: [taw.get_time(t, purist) for t in one_day for purist in (True, False)], repeats)
+                except Exception as e:
+                    logging.warning('Skipping broken language module ' + module_name + ': ' + str(e))
+    return results
+
+
+def benchmark_wirings(config, repeats):
+    results = {}
+    stencil = wiring.wiring(config)
+    width, height = stencil.WCA_WIDTH, stencil.WCA_HEIGHT
+    for cls in wiring.base_wiring.__subclasses__():
+        def run():
+            layout = cls(width, height)
+            [layout.getStripIndexFrom2D(x, y) for x in range(width) for y in range(height)]
+            [layout.mapMinutes(m) for m in range(1, 5)]
+
+        results['wiring/' + cls.__name__] = measure(run, repeats)
+    for layout in sorted(cls.__name__ for cls in wiring.base_wiring.__subclasses__() if cls.__name__ != 'gtk_wiring'):
+        results['wiring_compile/' + layout] = measure(
+            lambda: wiring.wiring(create_config(wordclock_display__wiring_layout=layout)), repeats)
+    return results
+
+
+def run_benchmarks(repeats):
+    display = create_display()
+    results = {}
+    results.update(benchmark_show(display, repeats))
+    results.update(benchmark_text(display, repeats))
+    results.update(benchmark_images(display, repeats))
+    results.update(benchmark_languages(repeats))
+    results.update(benchmark_wirings(create_config(), repeats))
+    return results
+
+
+def compare(results, previous, threshold):
+    """
+    Prints the change of each benchmark against previous results. Returns True, if any benchmark regressed.
+    """
+    regressed = False
+    for name in sorted(results):
+        if name not in previous:
+            print('{:<45} {:>10.3f} ms  (new)'.format(name, results[name]['min_ms']))
+            continue
+        ratio = results[name]['min_ms'] / max(previous[name]['min_ms'], 1e-9)
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  REGRESSION'
+            regressed = True
+        print('{:<45} {:>10.3f} ms  {:>10.3f} ms  {:>6.2f}x{}'.format(
+            name, previous[name]['min_ms'], results[name]['min_ms'], ratio, flag))
+    return regressed
+
+
+def main():
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], 'ho:c:r:t:', ['help', 'output=', 'compare=', 'repeats=', 'threshold='])
+    except getopt.GetoptError as err:
+        print(str(err))
+        sys.exit(2)
+    output_file = 'benchmark_results.json'
+    compare_file = None
+    repeats = 5
+    threshold = 0.1
+    for o, a in opts:
+        if o in ('-o', '--output'):
+            output_file = a
+        elif o in ('-c', '--compare'):
+            compare_file = a
+        elif o in ('-r', '--repeats'):
+            repeats = int(a)
+        elif o in ('-t', '--threshold'):
+            threshold = float(a)
+        elif o in ('-h', '--help'):
+            print('Save results to a json-file using -o option (default: ' + output_file + ')')
+            print('Compare against previous results using -c option')
+            print('Set the number of repetitions per benchmark using -r option (default: ' + str(repeats) + ')')
+            print('Set the relative slowdown considered a regression using -t option (default: ' + str(threshold) + ')')
+            sys.exit(0)
+        else:
+            assert False, 'unhandled option'
+
+    logging.basicConfig(level=logging.WARNING)
+    results = run_benchmarks(repeats)
+    with open(output_file, 'w') as f:
+        json.dump({'python': platform.python_version(),
+                   'machine': platform.machine(),
+                   'timestamp': time.time(),
+                   'results': results}, f, indent=2, sort_keys=True)
+    print('Saved ' + output_file + '.')
+
+    if compare_file is not None:
+        with open(compare_file) as f:
+            previous = json.load(f)['results']
+        if compare(results, previous, threshold):
+            sys.exit(1)
+    else:
+        for name in sorted(results):
+            print('{:<45} {:>10.3f} ms'.format(name, results[name]['min_ms']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import ast
+import configparser
+import getopt
+import os
+import sys
+import fontdemo
+
+
+def get_font_path(config, base_path):
+    """
+    Returns the path of the default font configured for the wordclock
+    """
+    if config.get('wordclock_display', 'default_font') == 'wcfont':
+        return os.path.join(base_path, 'wcfont.ttf')
+    return os.path.join('/usr/share/fonts/truetype/freefont/', config.get('wordclock_display', 'default_font') + '.ttf')
+
+
+def main():
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], 'hc:f:s:o:', ['help', 'config=', 'font=', 'sizes=', 'output='])
+    except getopt.GetoptError as err:
+        print(str(err))
+        sys.exit(2)
+    base_path = os.path.dirname(os.path.abspath(__file__))
+    configFile = os.path.join(base_path, 'wordclock_config', 'wordclock_config.cfg')
+    if not os.path.exists(configFile):
+        configFile = os.path.join(base_path, 'wordclock_config', 'wordclock_config.reference.cfg')
+    font = None
+    sizes = None
+    output_dir = os.path.join(base_path, fontdemo.ATLAS_DIR)
+    for o, a in opts:
+        if o in ('-c', '--config'):
+            configFile = a
+        elif o in ('-f', '--font'):
+            font = a
+        elif o in ('-s', '--sizes'):
+            sizes = [int(size) for size in a.split(',')]
+        elif o in ('-o', '--output'):
+            output_dir = a
+        elif o in ('-h', '--help'):
+            print('Compiles a font into glyph atlases, which are loaded by the wordclock instead of rasterizing the font')
+            print('Provide config-file using -c option (default: the wordclock\'s config-file)')
+            print('Provide the font file using -f option (default: default_font of the config-file)')
+            print('Provide comma-separated pixel sizes using -s option (default: height of the configured WCA)')
+            print('Provide the directory to store the atlases using -o option (default: ' + fontdemo.ATLAS_DIR + ' within the wordclock directory, where the wordclock loads them from)')
+            sys.exit(0)
+        else:
+            assert False, 'unhandled option'
+
+    cfg = configparser.ConfigParser()
+    cfg.read(configFile)
+    if font is None:
+        font = get_font_path(cfg, base_path)
+    if sizes is None:
+        # The wordclock renders text at the height of its WCA
+        try:
+            language = cfg.get('wordclock_display', 'language')
+        except configparser.Error:
+            # For backward compatibility (as wiring.py)
+            language = cfg.get('plugin_time_default', 'language')
+        sizes = [len(ast.literal_eval(cfg.get('language_options', language)))]
+
+    os.makedirs(output_dir, exist_ok=True)
+    for size in sizes:
+        atlas_file = fontdemo.build_atlas(font, size, atlas_file=fontdemo.atlas_path(font, size, output_dir))
+        print('Saved ' + atlas_file + ' (' + str(os.path.getsize(atlas_file)) + ' bytes).')
+
+
+if __name__ == '__main__':
+    main()
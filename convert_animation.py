@@ -0,0 +1,59 @@
+import getopt
+import glob
+import numpy as np
+import os
+import sys
+import wordclock_tools.wordclock_animation as wordclock_animation
+from wordclock_tools.wordclock_display import wordclock_display
+
+
+def convert(animation_dir, fps, encoding):
+    """
+    Converts an animation, stored as png-files (000.png, 001.png, ...) within animation_dir, into a container
+    """
+    num_of_frames = len(os.listdir(animation_dir))
+    frames = np.array([wordclock_display.decodeImage(os.path.join(animation_dir, str(i).zfill(3) + '.png'))
+                       for i in range(num_of_frames)])
+    path = wordclock_animation.container_path(animation_dir)
+    wordclock_animation.write_container(path, frames, 1.0 / fps if fps > 0 else 0, encoding)
+    print('Saved ' + path + ' (' + str(num_of_frames) + ' frames, ' + str(os.path.getsize(path)) + ' bytes).')
+
+
+def main():
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], 'haf:rd', ['help', 'all', 'fps=', 'raw', 'delta'])
+    except getopt.GetoptError as err:
+        print(str(err))
+        sys.exit(2)
+    base_path = os.path.dirname(os.path.abspath(__file__))
+    fps = 0
+    encoding = None
+    animation_dirs = args
+    for o, a in opts:
+        if o in ('-a', '--all'):
+            animation_dirs = sorted(glob.glob(os.path.join(base_path, 'wordclock_plugins', '*', 'animations', '*', '*', '')))
+        elif o in ('-f', '--fps'):
+            fps = float(a)
+        elif o in ('-r', '--raw'):
+            encoding = wordclock_animation.ENCODING_RAW
+        elif o in ('-d', '--delta'):
+            encoding = wordclock_animation.ENCODING_DELTA
+        elif o in ('-h', '--help'):
+            print('Converts animations (directories of png-files) into single-file containers, played by the wordclock')
+            print('Provide the animation directories as arguments or convert all animations of all plugins using -a option')
+            print('Store the frames per second using -f option (default: as requested by the plugin)')
+            print('Store raw rgb-values using -r option (default: palette-packed, if the animation has at most 256 colors)')
+            print('Store only the pixels changing from frame to frame using -d option (best for mostly static animations)')
+            sys.exit(0)
+        else:
+            assert False, 'unhandled option'
+
+    if not animation_dirs:
+        print('No animation provided. Use -h option for help.')
+        sys.exit(2)
+    for animation_dir in animation_dirs:
+        convert(animation_dir, fps, encoding)
+
+
+if __name__ == '__main__':
+    main()
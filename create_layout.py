@@ -8,17 +8,16 @@ import wordclock_tools.wiring as wiring
 
 
 def searchInWCA(wcl, index):
-    for i in range(wcl.WCA_WIDTH):
-        for j in range(wcl.WCA_HEIGHT):
-            if wcl.getStripIndexFrom2D(i, j) == index:
-                return i, j
+    source_type, source = wcl.getSourceFromStripIndex(index)
+    if source_type == 'wca':
+        return source
     return None
 
 
 def searchInMinutes(wcl, index):
-    for i in [1, 2, 3, 4]:
-        if wcl.mapMinutes(i) == index:
-            return i
+    source_type, source = wcl.getSourceFromStripIndex(index)
+    if source_type == 'minute':
+        return source
     print('Mapping error for minute: Index: ' + str(index))
     return None
 
@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-# Needs freetype-py>=1.0
+# Needs freetype-py>=1.0 and numpy
 
 # For more info see:
 # http://dbader.org/blog/monochrome-font-rendering-with-freetype-and-python
@@ -27,45 +27,60 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+import collections
 import freetype
+import hashlib
+import mmap
+import numpy
+import os
+import struct
+import threading
 
 
 class Bitmap(object):
     """
-    A 2D bitmap image represented as a list of byte values. Each byte indicates the state
+    A 2D bitmap image represented as an array of byte values. Each byte indicates the state
     of a single pixel in the bitmap. A value of 0 indicates that the pixel is `off`
     and any other value indicates that it is `on`.
     """
     def __init__(self, width, height, pixels=None):
         self.width = width
         self.height = height
-        self.pixels = pixels or bytearray(width * height)
+        if pixels is None:
+            self.pixels = numpy.zeros(width * height, dtype=numpy.uint8)
+        else:
+            self.pixels = numpy.asarray(bytearray(pixels) if isinstance(pixels, bytes) else pixels,
+                                        dtype=numpy.uint8).reshape(width * height)
+
+    @property
+    def array(self):
+        """The pixels as 2D array (rows, columns), sharing memory with `pixels`."""
+        return self.pixels.reshape(self.height, self.width)
 
     def __repr__(self):
         """Return a string representation of the bitmap's pixels."""
         rows = ''
-        for y in range(self.height):
-            for x in range(self.width):
-                rows += '#' if self.pixels[y * self.width + x] else '.'
+        for row in self.array:
+            rows += ''.join('#' if pixel else '.' for pixel in row)
             rows += '\n'
         return rows
 
     def bitblt(self, src, x, y):
         """Copy all pixels from `src` into this bitmap"""
-        srcpixel = 0
-        dstpixel = y * self.width + int(x)
-        row_offset = self.width - src.width
-
-        for sy in range(src.height):
-            for sx in range(src.width):
-                # Perform an OR operation on the destination pixel and the source pixel
-                # because glyph bitmaps may overlap if character kerning is applied, e.g.
-                # in the string "AVA", the "A" and "V" glyphs must be rendered with
-                # overlapping bounding boxes.
-                self.pixels[dstpixel] = self.pixels[dstpixel] or src.pixels[srcpixel]
-                srcpixel += 1
-                dstpixel += 1
-            dstpixel += row_offset
+        x, y = int(x), int(y)
+
+        # Clip the source to the destination's bounds
+        dst_x0, dst_y0 = max(x, 0), max(y, 0)
+        dst_x1, dst_y1 = min(x + src.width, self.width), min(y + src.height, self.height)
+        if dst_x0 >= dst_x1 or dst_y0 >= dst_y1:
+            return
+
+        # Perform an OR operation on the destination pixels and the source pixels
+        # because glyph bitmaps may overlap if character kerning is applied, e.g.
+        # in the string "AVA", the "A" and "V" glyphs must be rendered with
+        # overlapping bounding boxes.
+        self.array[dst_y0:dst_y1, dst_x0:dst_x1] |= \
+            src.array[dst_y0 - y:dst_y1 - y, dst_x0 - x:dst_x1 - x]
 
 
 class Glyph(object):
@@ -109,55 +124,86 @@ class Glyph(object):
     @staticmethod
     def unpack_mono_bitmap(bitmap):
         """
-        Unpack a freetype FT_LOAD_TARGET_MONO glyph bitmap into a bytearray where each
-        pixel is represented by a single byte.
+        Unpack a freetype FT_LOAD_TARGET_MONO glyph bitmap into an array where each
+        pixel is represented by a single byte (0: `off`, 1: `on`).
         """
-        # Allocate a bytearray of sufficient size to hold the glyph bitmap.
-        data = bytearray(bitmap.rows * bitmap.width)
-
-        # Iterate over every byte in the glyph bitmap. Note that we're not
-        # iterating over every pixel in the resulting unpacked bitmap --
-        # we're iterating over the packed bytes in the input bitmap.
-        for y in range(bitmap.rows):
-            for byte_index in range(bitmap.pitch):
-
-                # Read the byte that contains the packed pixel data.
-                byte_value = bitmap.buffer[y * bitmap.pitch + byte_index]
-
-                # We've processed this many bits (=pixels) so far. This determines
-                # where we'll read the next batch of pixels from.
-                num_bits_done = byte_index * 8
-
-                # Pre-compute where to write the pixels that we're going
-                # to unpack from the current byte in the glyph bitmap.
-                rowstart = y * bitmap.width + byte_index * 8
+        # Each row of the packed bitmap spans `pitch` bytes, holding 8 pixels per byte
+        # (most significant bit first). Rows are padded, so only the first `width` bits are used.
+        packed = numpy.array(bitmap.buffer, dtype=numpy.uint8).reshape(bitmap.rows, bitmap.pitch)
+        return numpy.unpackbits(packed, axis=1)[:, :bitmap.width].ravel()
 
-                # Iterate over every bit (=pixel) that's still a part of the
-                # output bitmap. Sometimes we're only unpacking a fraction of a byte
-                # because glyphs may not always fit on a byte boundary. So we make sure
-                # to stop if we unpack past the current row of pixels.
-                for bit_index in range(min(8, bitmap.width - num_bits_done)):
 
-                    # Unpack the next pixel from the current glyph byte.
-                    bit = byte_value & (1 << (7 - bit_index))
-
-                    # Write the pixel to the output bytearray. We ensure that `off`
-                    # pixels have a value of 0 and `on` pixels have a value of 1.
-                    data[rowstart + bit_index] = 1 if bit else 0
-
-        return data
+class GlyphCache(object):
+    """
+    A bounded cache of rendered glyphs and kerning offsets, shared by all Font objects.
+    Entries are keyed by (font file, pixel size, character(s)). If a cache is full,
+    its least recently used entry is evicted.
+    load() is called without the cache's lock held, so it must be thread safe: Fonts serialize
+    the loads from their FreeType face by their own lock (see Font.lock).
+    """
+    def __init__(self, max_glyphs=1024, max_kerning_pairs=8192):
+        self.max_glyphs = max_glyphs
+        self.max_kerning_pairs = max_kerning_pairs
+        self.glyphs = collections.OrderedDict()
+        self.kerning = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def glyph(self, key, load):
+        """Return the cached glyph for `key`, calling `load()` to render it on a miss."""
+        return self._lookup(self.glyphs, self.max_glyphs, key, load)
+
+    def kerning_offset(self, key, load):
+        """Return the cached kerning offset for `key`, calling `load()` to compute it on a miss."""
+        return self._lookup(self.kerning, self.max_kerning_pairs, key, load)
+
+    def _lookup(self, cache, max_size, key, load):
+        with self.lock:
+            if key in cache:
+                cache.move_to_end(key)
+                self.hits += 1
+                return cache[key]
+            self.misses += 1
+        value = load()
+        with self.lock:
+            if key in cache:
+                # Loaded by another thread meanwhile: Keep the cached one
+                cache.move_to_end(key)
+                return cache[key]
+            cache[key] = value
+            while len(cache) > max_size:
+                cache.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.glyphs.clear()
+            self.kerning.clear()
+
+
+# Glyph cache shared by all fonts. Cached glyphs must not be modified.
+glyph_cache = GlyphCache()
 
 
 class Font(object):
     def __init__(self, filename, size):
+        self.filename = filename
+        self.size = size
+        # A FreeType face must not be used by several threads at once, but fonts are shared (see getFont)
+        self.lock = threading.RLock()
         self.face = freetype.Face(filename)
         self.face.set_pixel_sizes(0, size)
 
     def glyph_for_character(self, char):
+        return glyph_cache.glyph((self.filename, self.size, char), lambda: self.load_glyph(char))
+
+    def load_glyph(self, char):
         # Let FreeType load the glyph for the given character and tell it to render
         # a monochromatic bitmap representation.
-        self.face.load_char(char, freetype.FT_LOAD_RENDER | freetype.FT_LOAD_TARGET_MONO)
-        return Glyph.from_glyphslot(self.face.glyph)
+        with self.lock:
+            self.face.load_char(char, freetype.FT_LOAD_RENDER | freetype.FT_LOAD_TARGET_MONO)
+            return Glyph.from_glyphslot(self.face.glyph)
 
     def render_character(self, char):
         glyph = self.glyph_for_character(char)
@@ -174,25 +220,37 @@ class Font(object):
         case the glyph for "V" has a negative horizontal kerning offset as it is
         moved slightly towards the "A".
         """
-        kerning = self.face.get_kerning(previous_char, char)
+        return glyph_cache.kerning_offset((self.filename, self.size, previous_char, char),
+                                          lambda: self.load_kerning_offset(previous_char, char))
+
+    def load_kerning_offset(self, previous_char, char):
+        with self.lock:
+            kerning = self.face.get_kerning(previous_char, char)
 
         # The kerning offset is given in FreeType's 26.6 fixed point format,
         # which means that the pixel values are multiples of 64.
         return kerning.x / 64
 
-    def text_dimensions(self, text):
-        """Return (width, height, baseline) of `text` rendered in the current font."""
+    def shape(self, text):
+        """
+        Lay out `text` in a single pass: Load each glyph and its kerning offset once and
+        return a ShapedText holding every glyph with its horizontal drawing position.
+        """
         width = 0
         max_ascent = 0
         max_descent = 0
+        x = 0
         previous_char = None
+        glyphs = []
 
-        # For each character in the text string we get the glyph
+        # For each character in the text string we get the glyph, position it
         # and update the overall dimensions of the resulting bitmap.
         for char in text:
             glyph = self.glyph_for_character(char)
             max_ascent = max(max_ascent, glyph.ascent)
             max_descent = max(max_descent, glyph.descent)
+
+            # Take kerning information into account before we position the glyph.
             kerning_x = self.kerning_offset(previous_char, char)
 
             # With kerning, the advance width may be less than the width of the glyph's bitmap.
@@ -200,43 +258,181 @@ class Font(object):
             # fit into the returned dimensions.
             width += max(glyph.advance_width + kerning_x, glyph.width + kerning_x)
 
+            x += kerning_x
+            glyphs.append((glyph, x))
+            x += glyph.advance_width
             previous_char = char
 
-        height = max_ascent + max_descent
-        return (int(width), height, max_descent)
+        return ShapedText(int(width), max_ascent + max_descent, max_descent, glyphs)
+
+    def text_dimensions(self, text):
+        """Return (width, height, baseline) of `text` rendered in the current font."""
+        shaped = self.shape(text)
+        return (shaped.width, shaped.height, shaped.baseline)
 
     def render_text(self, text, width=None, height=None, baseline=None):
         """
         Render the given `text` into a Bitmap and return it.
 
         If `width`, `height`, and `baseline` are not specified they are computed using
-        the `text_dimensions' method.
+        the `shape' method.
         """
-        if None in (width, height, baseline):
-            width, height, baseline = self.text_dimensions(text)
-
-        x = 0
-        previous_char = None
-        outbuffer = Bitmap(width, height)
+        return self.rasterize(self.shape(text), width, height, baseline)
 
-        for char in text:
-            glyph = self.glyph_for_character(char)
+    def rasterize(self, shaped, width=None, height=None, baseline=None):
+        """
+        Render a ShapedText (see `shape`) into a Bitmap and return it.
 
-            # Take kerning information into account before we render the
-            # glyph to the output bitmap.
-            x += self.kerning_offset(previous_char, char)
+        If `width`, `height`, and `baseline` are not specified they are taken from `shaped`.
+        """
+        if None in (width, height, baseline):
+            width, height, baseline = shaped.width, shaped.height, shaped.baseline
 
+        outbuffer = Bitmap(width, height)
+        for glyph, x in shaped.glyphs:
             # The vertical drawing position should place the glyph
             # on the baseline as intended.
             y = height - glyph.ascent - baseline
 
             outbuffer.bitblt(glyph.bitmap, x, y)
 
-            x += glyph.advance_width
-            previous_char = char
-
         return outbuffer
 
+
+class ShapedText(object):
+    """
+    A text laid out by Font.shape: Its dimensions and a run of (glyph, x), where x is
+    the horizontal drawing position of the glyph. Glyphs are placed on the baseline,
+    which is `baseline` pixels above the bottom of the text.
+    """
+    def __init__(self, width, height, baseline, glyphs):
+        self.width = width
+        self.height = height
+        self.baseline = baseline
+        self.glyphs = glyphs
+
+
+# Glyph atlas format: A header, followed by a table of glyphs (sorted by codepoint), a table of
+# kerning pairs (with non-zero offset only) and the glyph bitmaps (rows packed to 8 pixels per byte).
+ATLAS_MAGIC = b'WCFA'
+ATLAS_VERSION = 1
+ATLAS_HEADER = struct.Struct('<4sBH20sII')  # magic, version, pixel size, sha1 of font file, glyphs, kerning pairs
+ATLAS_GLYPH = numpy.dtype([('codepoint', '<u4'), ('width', '<u2'), ('height', '<u2'), ('top', '<i2'),
+                           ('advance_width', '<f4'), ('offset', '<u4')])
+ATLAS_KERNING = numpy.dtype([('left', '<u4'), ('right', '<u4'), ('offset', '<f4')])
+
+# Characters compiled into an atlas by default: Printable ASCII and Latin-1 characters
+ATLAS_CHARACTERS = ''.join(chr(c) for c in list(range(0x20, 0x7f)) + list(range(0xa0, 0x100))) + '\u20ac'
+
+# Directory of the wordclock (relative to its base path), where it looks for glyph atlases
+ATLAS_DIR = 'font_atlases'
+
+
+def atlas_path(filename, size, directory=None):
+    """
+    Return the path of the glyph atlas of the font file `filename` at the given pixel size,
+    stored within `directory` (default: next to the font file).
+    """
+    if directory is None:
+        directory = os.path.dirname(filename)
+    return os.path.join(directory, os.path.basename(filename) + '.' + str(size) + '.atlas')
+
+
+def file_hash(filename):
+    """Return the sha1 of a (font) file."""
+    with open(filename, 'rb') as f:
+        return hashlib.sha1(f.read()).digest()
+
+
+def build_atlas(filename, size, characters=ATLAS_CHARACTERS, atlas_file=None):
+    """
+    Compile the glyphs of `characters` (as far as available in the font) and their kerning
+    pairs into a glyph atlas file. Return the path of the atlas file.
+    """
+    if atlas_file is None:
+        atlas_file = atlas_path(filename, size)
+    font = Font(filename, size)
+    characters = sorted(set(char for char in characters if font.face.get_char_index(char)))
+
+    glyphs = numpy.zeros(len(characters), dtype=ATLAS_GLYPH)
+    bitmaps = []
+    offset = 0
+    for i, char in enumerate(characters):
+        glyph = font.load_glyph(char)
+        packed = numpy.packbits(glyph.bitmap.array, axis=1).tobytes()
+        glyphs[i] = (ord(char), glyph.width, glyph.height, glyph.top, glyph.advance_width, offset)
+        bitmaps.append(packed)
+        offset += len(packed)
+
+    kerning = []
+    if font.face.has_kerning:
+        for left in characters:
+            for right in characters:
+                kerning_x = font.load_kerning_offset(left, right)
+                if kerning_x:
+                    kerning.append((ord(left), ord(right), kerning_x))
+    kerning = numpy.array(kerning, dtype=ATLAS_KERNING)
+
+    with open(atlas_file, 'wb') as f:
+        f.write(ATLAS_HEADER.pack(ATLAS_MAGIC, ATLAS_VERSION, size, file_hash(filename), len(glyphs), len(kerning)))
+        f.write(glyphs.tobytes())
+        f.write(kerning.tobytes())
+        f.write(b''.join(bitmaps))
+    return atlas_file
+
+
+class AtlasFont(Font):
+    """
+    A font, which takes its glyphs and kerning offsets from a precompiled glyph atlas (see build_atlas),
+    mapped into memory. FreeType is only used (and the font file only opened) for glyphs missing in the atlas.
+    """
+    def __init__(self, filename, size, atlas_file):
+        self.filename = filename
+        self.size = size
+        self.lock = threading.RLock()
+        self._face = None
+
+        with open(atlas_file, 'rb') as f:
+            self.atlas = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, atlas_size, self.font_hash, num_glyphs, num_kerning = ATLAS_HEADER.unpack_from(self.atlas)
+        if magic != ATLAS_MAGIC or version != ATLAS_VERSION or atlas_size != size:
+            raise ValueError('Incompatible glyph atlas ' + atlas_file)
+
+        offset = ATLAS_HEADER.size
+        self.glyphs = numpy.frombuffer(self.atlas, dtype=ATLAS_GLYPH, count=num_glyphs, offset=offset)
+        offset += self.glyphs.nbytes
+        kerning = numpy.frombuffer(self.atlas, dtype=ATLAS_KERNING, count=num_kerning, offset=offset)
+        offset += kerning.nbytes
+        self.bitmaps = numpy.frombuffer(self.atlas, dtype=numpy.uint8, offset=offset)
+
+        self.glyph_index = {chr(codepoint): i for i, codepoint in enumerate(self.glyphs['codepoint'].tolist())}
+        self.kerning = {(chr(left), chr(right)): kerning_x for left, right, kerning_x in kerning.tolist()}
+
+    @property
+    def face(self):
+        # Open the font file only, if needed
+        with self.lock:
+            if self._face is None:
+                self._face = freetype.Face(self.filename)
+                self._face.set_pixel_sizes(0, self.size)
+            return self._face
+
+    def load_glyph(self, char):
+        if char not in self.glyph_index:
+            return Font.load_glyph(self, char)
+        codepoint, width, height, top, advance_width, offset = self.glyphs[self.glyph_index[char]].tolist()
+        pitch = (width + 7) // 8
+        packed = self.bitmaps[offset:offset + pitch * height].reshape(height, pitch)
+        pixels = numpy.unpackbits(packed, axis=1)[:, :width].ravel()
+        return Glyph(pixels, width, height, top, advance_width)
+
+    def load_kerning_offset(self, previous_char, char):
+        if previous_char is None:
+            return 0
+        if previous_char in self.glyph_index and char in self.glyph_index:
+            return self.kerning.get((previous_char, char), 0)
+        return Font.load_kerning_offset(self, previous_char, char)
+
 if __name__ == '__main__':
     # Be sure to place 'helvetica.ttf' (or any other ttf / otf font file) in the working directory.
     fnt = Font('helvetica.ttf', 24)
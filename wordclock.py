@@ -1,3 +1,4 @@
+import asyncio
 import sys
 import coloredlogs
 from importlib import import_module
@@ -13,6 +14,7 @@ from shutil import copyfile
 
 import wordclock_tools.wordclock_config as wccfg
 import wordclock_tools.wordclock_display as wcd
+import wordclock_tools.wordclock_runtime as wcruntime
 import wordclock_interfaces.event_handler as wci
 import wordclock_interfaces.web_interface as wciweb
 
@@ -28,17 +30,28 @@ class wordclock:
         # Get path of the directory where this file is stored
         self.basePath = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 
-        self.currentGitHash = subprocess.check_output(["git", "describe", "--tags"], cwd=self.basePath).strip().decode()
+        try:
+            self.currentGitHash = subprocess.check_output(["git", "describe", "--tags"], cwd=self.basePath).strip().decode()
+        except Exception:
+            # e.g. shallow checkouts without tags on build servers
+            self.currentGitHash = "unknown"
         logging.info("Software version: " + self.currentGitHash)
 
         self.config = wccfg.wordclock_config(self.basePath)
 
         # Create object to interact with the wordclock using the interface of your choice
-        self.wci = wci.event_handler()
+        self.wci = wci.event_handler(queue_size=self.config.getint('wordclock_interface', 'event_queue_size'),
+                                     coalesce_time=self.config.getfloat('wordclock_interface', 'event_coalesce_time'))
+        # Passed to plugins, whose run() is a coroutine
+        self.async_wci = wcruntime.async_event_handler(self.wci)
 
         self.developer_mode_active = self.config.getboolean('wordclock', 'developer_mode')
+        self.headless_active = self.config.getboolean('wordclock', 'headless')
+        self.asyncio_active = self.config.getboolean('wordclock', 'asyncio_core')
 
-        if self.developer_mode_active:
+        if self.headless_active:
+            logging.info('Running headless: No LEDs, GPIOs or simulation window will be used.')
+        elif self.developer_mode_active:
             import wx        
             self.app = wx.App()
         else:
@@ -92,15 +105,12 @@ class wordclock:
                 #detailed error (traceback)
                 traceback.print_exc(limit=1)
 
+        # Decode the icons of all imported plugins once
+        self.wcd.buildIconAtlas([plugin.name for plugin in self.plugins])
+
         # Create object to interact with the wordclock using the interface of your choice
         self.plugin_index = 0
-        self.wciweb = wciweb.web_interface(self)
-        
-        self.scrollenable = False
-        self.scrolltext = ""
-        self.scrolldate = ""
-        self.scrolltime = ""
-        self.scrollrepeat = 0
+        self.wciweb = wciweb.web_interface(self, threaded=not self.asyncio_active)
 
     def startup(self):
         """
@@ -125,12 +135,14 @@ class wordclock:
 
         try:
 	        logging.info('Running plugin ' + self.plugins[self.plugin_index].name + '.')
-	        self.plugins[self.plugin_index].run(self.wcd, self.wci)
+	        self.wcd.metrics.setPlugin(self.plugins[self.plugin_index].name)
+	        if inspect.iscoroutinefunction(self.plugins[self.plugin_index].run):
+	            # Coroutine plugins run on their own event loop, unless run by the asyncio core (see wordclock_runtime)
+	            asyncio.run(self.plugins[self.plugin_index].run(self.wcd, self.async_wci))
+	        else:
+	            self.plugins[self.plugin_index].run(self.wcd, self.wci)
         except:
-            logging.error('Error in plugin ' + self.plugins[self.plugin_index].name + '.')
-            logging.error('PLEASE PROVIDE THE CURRENT SOFTWARE VERSION (GIT HASH), WHEN REPORTING THIS ERROR: ' + self.currentGitHash)
-            self.wcd.setImage(os.path.join(self.pathToGeneralIcons, 'error.png'))
-            traceback.print_exc()
+            self.reportPluginError()
             raise
             time.sleep(2)
 
@@ -141,6 +153,15 @@ class wordclock:
         # Cleanup display after exiting plugin
         self.wcd.resetDisplay()
 
+    def reportPluginError(self):
+        """
+        Reports an error of the currently selected plugin (to be called while handling the exception)
+        """
+        logging.error('Error in plugin ' + self.plugins[self.plugin_index].name + '.')
+        logging.error('PLEASE PROVIDE THE CURRENT SOFTWARE VERSION (GIT HASH), WHEN REPORTING THIS ERROR: ' + self.currentGitHash)
+        self.wcd.setImage(os.path.join(self.pathToGeneralIcons, 'error.png'))
+        traceback.print_exc()
+
     def runNext(self, plugin_index=None):
         if(plugin_index == self.plugin_index):
             return
@@ -163,28 +184,37 @@ class wordclock:
             if self.wci.nextAction == wci.next_action.RUN_DEFAULT_PLUGIN:
                 self.plugin_index = self.default_plugin
             elif self.wci.nextAction == wci.next_action.GOTO_MENU:
-                while True:
-                    # The showIcon-command expects to have a plugin logo available
-                    self.wcd.showIcon(plugin=self.plugins[self.plugin_index].name, iconName='logo')
-                    time.sleep(self.wci.lock_time)
-                    evt = self.wci.waitForEvent()
-                    if evt == self.wci.EVENT_BUTTON_LEFT:
-                        self.plugin_index -= 1
-                        if self.plugin_index == -1:
-                            self.plugin_index = len(self.plugins) - 1
-                        time.sleep(self.wci.lock_time)
-                    if evt == self.wci.EVENT_BUTTON_RETURN:
-                        time.sleep(self.wci.lock_time)
-                        break
-                    if evt == self.wci.EVENT_EXIT_PLUGIN or evt == self.wci.EVENT_NEXT_PLUGIN_REQUESTED:
-                        break
-                    if evt == self.wci.EVENT_BUTTON_RIGHT:
-                        self.plugin_index += 1
-                        if self.plugin_index == len(self.plugins):
-                            self.plugin_index = 0
-                        time.sleep(self.wci.lock_time)
+                self.runMenu()
+
+    def runMenu(self):
+        """
+        Loops through the menu, until the next plugin is selected
+        """
+        while True:
+            # The showIcon-command expects to have a plugin logo available
+            self.wcd.showIcon(plugin=self.plugins[self.plugin_index].name, iconName='logo')
+            time.sleep(self.wci.lock_time)
+            evt = self.wci.waitForEvent()
+            if evt == self.wci.EVENT_BUTTON_LEFT:
+                self.plugin_index -= 1
+                if self.plugin_index == -1:
+                    self.plugin_index = len(self.plugins) - 1
+                time.sleep(self.wci.lock_time)
+            if evt == self.wci.EVENT_BUTTON_RETURN:
+                time.sleep(self.wci.lock_time)
+                break
+            if evt == self.wci.EVENT_EXIT_PLUGIN or evt == self.wci.EVENT_NEXT_PLUGIN_REQUESTED:
+                break
+            if evt == self.wci.EVENT_BUTTON_RIGHT:
+                self.plugin_index += 1
+                if self.plugin_index == len(self.plugins):
+                    self.plugin_index = 0
+                time.sleep(self.wci.lock_time)
 
     def run_forever(self):
+        if self.asyncio_active:
+            wcruntime.wordclock_runtime(self).run()
+            return
         self.startup()        
         self.run()
 
@@ -200,7 +230,7 @@ if __name__ == '__main__':
 
     word_clock = wordclock()
     developer_mode = word_clock.developer_mode_active
-    if not developer_mode:
+    if not developer_mode or word_clock.headless_active:
         word_clock.run_forever()
     else:
         print("We are not on raspberry...open simulation window")        
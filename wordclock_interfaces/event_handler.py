@@ -1,3 +1,5 @@
+import collections
+import logging
 import threading
 from monotonic import monotonic as _time
 
@@ -8,6 +10,86 @@ class next_action:
     RUN_DEFAULT_PLUGIN = 3
 
 
+class wordclock_event:
+    """
+    An event as queued by the event handler: Its type (e.g. EVENT_BUTTON_LEFT),
+    its source (e.g. SOURCE_GPIO) and the time it occurred at (monotonic)
+    """
+
+    def __init__(self, type, source, timestamp):
+        self.type = type
+        self.source = source
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return 'wordclock_event(' + str(self.type) + ', ' + self.source + ', ' + str(self.timestamp) + ')'
+
+
+class event_subscription:
+    """
+    A bounded queue of events, filled by the event handler. Each subscriber receives all events
+    (optionally restricted to some types), independent of other subscribers.
+    """
+
+    def __init__(self, handler, queue_size, types=None):
+        self.handler = handler
+        self.queue_size = queue_size
+        self.types = types
+        self.events = collections.deque()
+        self.dropped = 0
+
+    def push(self, event):
+        """
+        Queues an event. If the queue is full, its oldest button event is dropped.
+        Needs to be called with the condition of the event handler acquired.
+        """
+        if self.types is not None and event.type not in self.types:
+            return
+        if event.type in event_handler.EXIT_EVENTS and \
+                any(queued.type in event_handler.EXIT_EVENTS for queued in self.events):
+            # Leaving the plugin has already been requested
+            return
+        if len(self.events) >= self.queue_size:
+            for queued in self.events:
+                if queued.type not in event_handler.EXIT_EVENTS:
+                    self.events.remove(queued)
+                    break
+            else:
+                self.events.popleft()
+            self.dropped += 1
+            logging.warning('Event queue is full: Dropped an event')
+        self.events.append(event)
+
+    def get(self, timeout=None, types=None):
+        """
+        Returns the oldest queued event (of the given types, if provided), waiting up to timeout seconds
+        (None: forever) for an event to arrive. Returns None, if no event arrived in time.
+        Events of other types, which are queued before the returned event, are discarded.
+        """
+        deadline = None if timeout is None else _time() + timeout
+        with self.handler.condition:
+            while True:
+                while self.events:
+                    event = self.events.popleft()
+                    if types is None or event.type in types:
+                        return event
+                if deadline is None:
+                    self.handler.condition.wait()
+                else:
+                    remaining = deadline - _time()
+                    if remaining <= 0:
+                        return None
+                    self.handler.condition.wait(remaining)
+
+    def clear(self):
+        with self.handler.condition:
+            self.events.clear()
+
+    def __len__(self):
+        with self.handler.condition:
+            return len(self.events)
+
+
 class event_handler:
     EVENT_INVALID = -1
 
@@ -17,13 +99,52 @@ class event_handler:
     EVENT_EXIT_PLUGIN = 3
     EVENT_NEXT_PLUGIN_REQUESTED = 4
 
+    EXIT_EVENTS = (EVENT_EXIT_PLUGIN, EVENT_NEXT_PLUGIN_REQUESTED)
+
     BUTTONS = {'left': EVENT_BUTTON_LEFT, 'right': EVENT_BUTTON_RIGHT, 'return': EVENT_BUTTON_RETURN}
 
-    def __init__(self):
+    SOURCE_INTERNAL = 'internal'
+    SOURCE_GPIO = 'gpio'
+    SOURCE_WEB = 'web'
+    SOURCE_SIMULATOR = 'simulator'
+
+    def __init__(self, queue_size=16, coalesce_time=0.0):
+        """
+        queue_size: Maximum number of events queued per subscriber
+        coalesce_time: Button events of the same type and source, which follow each other within
+                       this number of seconds, are merged into one (0: disabled)
+        """
         self.condition = threading.Condition()
-        self.event = self.EVENT_INVALID
+        self.queue_size = queue_size
+        self.coalesce_time = coalesce_time
+        self.last_events = {}
+        self.subscriptions = []
+        self.listeners = []
         self.lock_time = 0.1
         self.nextAction = next_action.RUN_DEFAULT_PLUGIN
+        # Queue of the running plugin (and the menu), served by waitForEvent and waitForExit
+        self.default_subscription = self.subscribe()
+
+    def subscribe(self, queue_size=None, types=None):
+        """
+        Returns a new subscription, which receives all events of the given types (default: all) from now on
+        """
+        subscription = event_subscription(self, queue_size or self.queue_size, types)
+        with self.condition:
+            self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.condition:
+            self.subscriptions.remove(subscription)
+
+    def addListener(self, callback):
+        """
+        Registers a function, which is called (without arguments) whenever an event is queued,
+        e.g. to wake up an asyncio event loop. Called with the condition acquired: Must not block.
+        """
+        with self.condition:
+            self.listeners.append(callback)
 
     def getNextAction(self, evt):
         if evt == self.EVENT_NEXT_PLUGIN_REQUESTED:
@@ -33,51 +154,42 @@ class event_handler:
         else:
             self.nextAction = next_action.RUN_DEFAULT_PLUGIN
 
+    def setEvent(self, evt, source=SOURCE_INTERNAL):
+        """
+        Queues an event for all subscribers
+        """
+        if evt is None or evt == self.EVENT_INVALID:
+            return
+        event = wordclock_event(evt, source, _time())
+        with self.condition:
+            if evt not in self.EXIT_EVENTS:
+                # Pending requests to leave the plugin are merged by the subscriptions
+                # Merged events do not extend the window: A held or bouncing button still gets through
+                last = self.last_events.get((evt, source))
+                if last is not None and event.timestamp - last < self.coalesce_time:
+                    return
+                self.last_events[(evt, source)] = event.timestamp
+            for subscription in self.subscriptions:
+                subscription.push(event)
+            self.condition.notify_all()
+            for listener in self.listeners:
+                listener()
+
     def waitForEvent(self, seconds=None):
-        self.condition.acquire()
-        self.__wait_for(lambda: self.event != self.EVENT_INVALID, seconds)
-        evt = self.event
+        """
+        Returns the type of the oldest queued event, waiting up to seconds (None: forever).
+        Returns EVENT_INVALID, if no event arrived in time.
+        """
+        event = self.default_subscription.get(seconds)
+        evt = self.EVENT_INVALID if event is None else event.type
         self.getNextAction(evt)
-        self.event = self.EVENT_INVALID
-        self.condition.release()
         return evt
 
-    def setEvent(self, evt):
-        self.condition.acquire()
-        if self.event != self.EVENT_EXIT_PLUGIN and self.event != self.EVENT_NEXT_PLUGIN_REQUESTED:
-            self.event = evt
-        self.condition.notifyAll()
-        self.condition.release()
-
     def waitForExit(self, seconds=None):
-        self.condition.acquire()
-        exitWasTriggered = self.__wait_for(
-            lambda: self.event == self.EVENT_EXIT_PLUGIN or self.event == self.EVENT_NEXT_PLUGIN_REQUESTED, seconds)
-        self.getNextAction(self.event)
-        self.event = self.EVENT_INVALID
-        self.condition.release()
-        return True if exitWasTriggered else False
-
-    def __wait_for(self, predicate, timeout=None):
-        """
-        Wait until a condition evaluates to True.
-
-        predicate should be a callable which result will be interpreted as a
-        boolean value.  A timeout may be provided giving the maximum time to
-        wait.
-
-        """
-        endtime = None
-        waittime = timeout
-        result = predicate()
-        while not result:
-            if waittime is not None:
-                if endtime is None:
-                    endtime = _time() + waittime
-                else:
-                    waittime = endtime - _time()
-                    if waittime <= 0:
-                        break
-            self.condition.wait(waittime)
-            result = predicate()
-        return result
+        """
+        Waits up to seconds (None: forever) for the plugin to be left. Returns True, if requested.
+        Other events (e.g. button presses) are discarded.
+        """
+        event = self.default_subscription.get(seconds, self.EXIT_EVENTS)
+        self.getNextAction(self.EVENT_INVALID if event is None else event.type)
+        return event is not None
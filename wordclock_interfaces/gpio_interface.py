@@ -50,10 +50,10 @@ class gpio_interface:
                               bouncetime=100)
 
     def _left(self):
-        self.evtHandler.setEvent(self.evtHandler.EVENT_BUTTON_LEFT)
+        self.evtHandler.setEvent(self.evtHandler.EVENT_BUTTON_LEFT, self.evtHandler.SOURCE_GPIO)
 
     def _return(self):
-        self.evtHandler.setEvent(self.evtHandler.EVENT_BUTTON_RETURN)
+        self.evtHandler.setEvent(self.evtHandler.EVENT_BUTTON_RETURN, self.evtHandler.SOURCE_GPIO)
 
     def _right(self):
-        self.evtHandler.setEvent(self.evtHandler.EVENT_BUTTON_RIGHT)
+        self.evtHandler.setEvent(self.evtHandler.EVENT_BUTTON_RIGHT, self.evtHandler.SOURCE_GPIO)
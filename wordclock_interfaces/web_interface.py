@@ -61,17 +61,20 @@ class web_interface:
         'scrollrepeat': fields.Integer(required=True, description='Repeat of text to scroll')
     })
 
-    def __init__(self, wordclock):
+    def __init__(self, wordclock, threaded=True):
+        """
+        threaded: Serve the app within its own thread (else, the caller runs threaded_app, see wordclock_runtime)
+        """
         self.app.wclk = wordclock
         self.app.debug = False
-        _thread.start_new_thread(self.threaded_app, ())
+        if threaded:
+            _thread.start_new_thread(self.threaded_app, ())
+
+    def getPort(self):
+        return 8080 if self.app.wclk.developer_mode_active or self.app.wclk.headless_active else 80
 
     def threaded_app(self):
-        port = 8080 if self.app.wclk.developer_mode_active else 80
-        self.app.run(host='0.0.0.0', port=port)
-        
-    def scrolltext_task():
-        print("scrolltext_task")
+        self.app.run(host='0.0.0.0', port=self.getPort())
 
 
 @web_interface.app.route('/')
@@ -135,7 +138,7 @@ class Button(Resource):
     def post(self):
         button_type = web_interface.api.payload.get('button')
         event = web_interface.app.wclk.wci.BUTTONS.get(button_type)
-        web_interface.app.wclk.wci.setEvent(event)
+        web_interface.app.wclk.wci.setEvent(event, web_interface.app.wclk.wci.SOURCE_WEB)
         return "Button " + button_type + " triggered"
 
 
@@ -211,6 +214,34 @@ class Brightness(Resource):
         return "Wordclock brightness set to " + str(brightness)
 
 
+@web_interface.api.route('/metrics')
+class Metrics(Resource):
+    @web_interface.api.doc(
+        description='Returns render statistics and, if collect_metrics is enabled, timings of each render stage',
+        responses={
+            200: 'Success',
+            400: 'Bad request'})
+    def get(self):
+        metrics = web_interface.app.wclk.wcd.metrics.asdict()
+        metrics['statistics'] = web_interface.app.wclk.wcd.getRenderStatistics()
+        return metrics
+
+
+@web_interface.api.route('/display')
+class Display(Resource):
+    @web_interface.api.doc(
+        description='Returns 8bit RGB color values of all LEDs currently displayed: The WCA (columns of rows) and the minutes',
+        responses={
+            200: 'Success',
+            400: 'Bad request'})
+    def get(self):
+        wca, minutes = web_interface.app.wclk.wcd.getSnapshot()
+        return {
+            'wca': wca.tolist(),
+            'minutes': minutes.tolist()
+        }
+
+
 @web_interface.api.route('/color_temperature')
 class ColorTemperature(Resource):
     @web_interface.api.doc(
@@ -239,12 +270,13 @@ class scrolltext(Resource):
             200: 'Success',
             400: 'Bad request'})
     def get(self):
+        schedule = web_interface.app.wclk.wcd.overlay.getSchedule()
         return {
-            'scrollenable': wcc.scrollenable, #web_interface.app.wclk
-            'scrolltext': wcc.scrolltext,
-            'scrolldate': wcc.scrolldate,
-            'scrolltime': wcc.scrolltime,
-            'scrollrepeat': wcc.scrollrepeat
+            'scrollenable': schedule['enabled'],
+            'scrolltext': schedule['text'],
+            'scrolldate': schedule['start'].strftime('%Y-%m-%d') if schedule['start'] else '',
+            'scrolltime': schedule['start'].strftime('%H:%M') if schedule['start'] else '',
+            'scrollrepeat': schedule['repeat']
         }
 
     @web_interface.api.doc(
@@ -254,21 +286,26 @@ class scrolltext(Resource):
             400: 'Bad request'})
     @web_interface.api.expect(web_interface.scrolltext_model)
     def post(self):
-        wcc.scrolltext = web_interface.api.payload.get('scrolltext')
-        wcc.scrolldate = web_interface.api.payload.get('scrolldate')
-        wcc.scrolltime = web_interface.api.payload.get('scrolltime')
+        overlay = web_interface.app.wclk.wcd.overlay
+        scrolltext = web_interface.api.payload.get('scrolltext')
+        scrolldate = web_interface.api.payload.get('scrolldate')
+        scrolltime = web_interface.api.payload.get('scrolltime')
         try:
-            print(wcc.scrolldate, wcc.scrolltime)
-            wcc.scrolldatetime = datetime.datetime.strptime(wcc.scrolldate + " " + wcc.scrolltime, '%Y-%m-%d %H:%M')
+            scrolldatetime = datetime.datetime.strptime(scrolldate + " " + scrolltime, '%Y-%m-%d %H:%M')
         except:
-            print("Not a date or time")
-        wcc.scrollrepeat = web_interface.api.payload.get('scrollrepeat')
-        scrollenable_new = web_interface.api.payload.get('scrollenable')
-        if ((wcc.scrollenable == False) and (scrollenable_new == True)):
-            wcc.scrollactive = True
-            web_interface.app.wclk.wcd.showText(wcc.scrolltext)
-            wcc.scrollactive = False
-        if ((wcc.scrollenable == True) and (scrollenable_new == False)):
-            pass
-        wcc.scrollenable = web_interface.api.payload.get('scrollenable')
+            logging.warning("Not a date or time: " + str(scrolldate) + " " + str(scrolltime))
+            scrolldatetime = None
+        try:
+            scrollrepeat = int(web_interface.api.payload.get('scrollrepeat'))
+        except (TypeError, ValueError):
+            scrollrepeat = -1
+        if scrollrepeat < 0:
+            web_interface.api.abort(400, 'Repeat must be a number of seconds (0: continuous). Received ' +
+                                    str(web_interface.api.payload.get('scrollrepeat')))
+        scrollenable = web_interface.api.payload.get('scrollenable')
+        scrollenable_prev = overlay.getSchedule()['enabled']
+        overlay.scheduleText(scrolltext, scrolldatetime, scrollrepeat, scrollenable)
+        if scrollenable and not scrollenable_prev:
+            # Show the text right away. Scrolling is performed by the overlay, so the request returns immediately
+            overlay.showText(scrolltext)
         return "Wordclock scrolltext variables updated"
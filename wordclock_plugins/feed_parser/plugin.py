@@ -1,5 +1,6 @@
 import os
 import feedparser
+import wordclock_tools.wordclock_runtime as wcruntime
 
 
 class plugin:
@@ -17,9 +18,10 @@ class plugin:
         self.pretty_name = "RSS-feed parser"
         self.description = "Displays latest news from " + self.rss_url + "."
 
-    def run(self, wcd, wci):
+    async def run(self, wcd, wci):
         """
         Displaying latest news
         """
-        feed = feedparser.parse(self.rss_url)
-        wcd.showText(feed["items"][0]["title"], fps=15)
+        # Fetch the feed and scroll the headline within worker threads, while the event loop keeps running
+        feed = await wcruntime.run_blocking(feedparser.parse, self.rss_url)
+        await wcruntime.run_blocking(lambda: wcd.showText(feed["items"][0]["title"], fps=15))
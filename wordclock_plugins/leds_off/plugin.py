@@ -1,4 +1,5 @@
 import os
+import wordclock_tools.wordclock_runtime as wcruntime
 
 
 class plugin:
@@ -15,10 +16,10 @@ class plugin:
         self.pretty_name = "LEDs off"
         self.description = "Disables the wordclock display."
 
-    def run(self, wcd, wci):
+    async def run(self, wcd, wci):
         """
         Displays nothing until aborted by user interaction on pin button_return
         """
         wcd.resetDisplay()
-        wcd.show()
-        wci.waitForEvent()
+        await wcruntime.show(wcd)
+        await wci.waitForEvent()
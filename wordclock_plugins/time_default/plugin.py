@@ -1,9 +1,11 @@
+import asyncio
 import datetime
 import logging
 import os
-import time
 import wordclock_tools.wordclock_colors as wcc
 import wordclock_tools.wordclock_display as wcd
+import wordclock_tools.wordclock_runtime as wcruntime
+import wordclock_tools.wordclock_transitions as wordclock_transitions
 
 
 class plugin:
@@ -25,7 +27,7 @@ class plugin:
 
         self.animation = ''.join(config.get('plugin_' + self.name, 'animation'))
 
-        animations = ["fadeOutIn", "typewriter", "none"]
+        animations = ["fadeOutIn"] + sorted(name for name in wordclock_transitions.transitions if name != "fadeOutIn") + ["none"]
 
         if self.animation not in animations:
             logging.warning('No animation set for default plugin within the config-file. ' + animations[0] + ' animation will be used.')
@@ -129,93 +131,99 @@ class plugin:
             import adafruit_tsl2561
             i2c = busio.I2C(board.SCL, board.SDA)
             self.sensor = adafruit_tsl2561.TSL2561(i2c,self.brightness_sensor_address)
+        # Brightness according to the latest sample of the sensor (see sample_brightness)
+        self.sensor_brightness = None
         # save current brightness for switching back from sleep mode
         self.wake_brightness = self.brightness_mode_pos
 
-    def run(self, wcd, wci):
+    async def run(self, wcd, wci):
         """
         Displays time until aborted by user interaction on pin button_return
         """
         # Some initializations of the "previous" minute
         prev_min = -1
+        sensor_timer = None
         if self.use_brightness_sensor:
-            sensorMax = 100.0
-            sensorCurrent = 120.0
-            brightnessMin = 50.0
-            brightnessMax = 255.0
+            self.brightness_mode_pos = self.brightness_from_lux(120.0)
+            # Reading the sensor blocks for a while: Sample it in the background and use the latest sample
+            self.sensor_brightness = None
+            sensor_timer = wcruntime.add_timer(2.0, self.sample_brightness)
 
-            self.brightness_mode_pos = min(((((brightnessMax - brightnessMin) / sensorMax) * sensorCurrent) + brightnessMin),255)
+        try:
+            while True:
+                # Get current time
+                now = datetime.datetime.now()
+                newBrightness = self.brightness_mode_pos
+                if self.use_brightness_sensor and self.sensor_brightness is not None:
+                    newBrightness = self.sensor_brightness
 
-        while True:
-            # Get current time
-            now = datetime.datetime.now()
-            newBrightness = self.brightness_mode_pos
-            if self.use_brightness_sensor:
-                try:
-                    sensorCurrent = self.sensor.lux
-                    if isinstance(sensorCurrent, float):
-                        # print('sensorCurrent is ' + str(sensorCurrent))
-                        newBrightness = min(((((brightnessMax - brightnessMin) / sensorMax) * sensorCurrent) + brightnessMin),255)
-                        newBrightness = int(newBrightness)
-                        time.sleep(0.2)
-                except IOError as e:
-                    print(e)
+                # Check, if a minute has passed (to render the new time)
+                if prev_min < now.minute:
+                    sleepActive = \
+                        self.sleep_begin <= now.time() < self.sleep_end or \
+                        self.sleep_end < self.sleep_begin <= now.time() <= datetime.time(23, 59, 59) or \
+                        now.time() < self.sleep_end < self.sleep_begin
+
+                    wcd.setBrightness(self.sleep_brightness if sleepActive else newBrightness)
 
-            # Check if text needs to be displayed
-            if wcc.scrollenable:
-                try:
-                    if datetime.datetime.now() > wcc.scrolldatetime:
-                        wcd.showText(wcc.scrolltext)
-                        wcc.scrolldatetime = wcc.scrolldatetime + datetime.timedelta(seconds = wcc.scrollrepeat)
-                except:
-                    print("Date and time not set")
+                    # Set background color
+                    if self.play_animation_each_minute:
+                        animation = self.animation
+                    else:
+                        animation = self.animation if now.minute%5 == 0 else 'None'
 
-            # Check, if a minute has passed (to render the new time)
-            if prev_min < now.minute:
-                sleepActive = \
-                    self.sleep_begin <= now.time() < self.sleep_end or \
-                    self.sleep_end < self.sleep_begin <= now.time() <= datetime.time(23, 59, 59) or \
-                    now.time() < self.sleep_end < self.sleep_begin
+                    await self.show_time(wcd, wci, animation, animation_speed=self.animation_speed)
+                    prev_min = -1 if now.minute == 59 else now.minute
 
-                wcd.setBrightness(self.sleep_brightness if sleepActive else newBrightness)
- 
-                # Set background color
-                if self.play_animation_each_minute:
-                    animation = self.animation
-                else:
-                    animation = self.animation if now.minute%5 == 0 else 'None'
+                if newBrightness != self.brightness_mode_pos:
+                    self.brightness_mode_pos = newBrightness
+                    wcd.setBrightness(newBrightness)
+                    await self.show_time(wcd, wci, animation='None')
 
-                self.show_time(wcd, wci, animation, animation_speed=self.animation_speed)
-                prev_min = -1 if now.minute == 59 else now.minute
+                event = await wci.waitForEvent(2)
+                # Switch display color, if button_left is pressed
+                if event == wci.EVENT_BUTTON_LEFT:
+                    self.color_mode_pos += 1
+                    if self.color_mode_pos == len(self.color_modes):
+                        self.color_mode_pos = 0
+                    self.bg_color = self.color_modes[self.color_mode_pos][0]
+                    self.word_color = self.color_modes[self.color_mode_pos][1]
+                    self.minute_color = self.color_modes[self.color_mode_pos][2]
+                    await self.show_time(wcd, wci, animation=self.animation, animation_speed=self.animation_speed)
+                    await asyncio.sleep(0.2)
+                if (event == wci.EVENT_BUTTON_RETURN) \
+                        or (event == wci.EVENT_EXIT_PLUGIN) \
+                        or (event == wci.EVENT_NEXT_PLUGIN_REQUESTED):
+                    wcd.setBrightness(self.wake_brightness)
+                    await wcruntime.show(wcd)
+                    self.skip_sleep = False
+                    return
+                if event == wci.EVENT_BUTTON_RIGHT:
+                    await asyncio.sleep(wci.lock_time)
+                    await self.color_selection(wcd, wci)
+        finally:
+            if sensor_timer is not None:
+                sensor_timer.cancel()
 
-            if newBrightness != self.brightness_mode_pos:
-                self.brightness_mode_pos = newBrightness
-                wcd.setBrightness(newBrightness)
-                self.show_time(wcd, wci, animation='None')
+    def brightness_from_lux(self, lux):
+        sensorMax = 100.0
+        brightnessMin = 50.0
+        brightnessMax = 255.0
+        return min(((((brightnessMax - brightnessMin) / sensorMax) * lux) + brightnessMin),255)
 
-            event = wci.waitForEvent(2)
-            # Switch display color, if button_left is pressed
-            if event == wci.EVENT_BUTTON_LEFT:
-                self.color_mode_pos += 1
-                if self.color_mode_pos == len(self.color_modes):
-                    self.color_mode_pos = 0
-                self.bg_color = self.color_modes[self.color_mode_pos][0]
-                self.word_color = self.color_modes[self.color_mode_pos][1]
-                self.minute_color = self.color_modes[self.color_mode_pos][2]
-                self.show_time(wcd, wci, animation=self.animation, animation_speed=self.animation_speed)
-                time.sleep(0.2)
-            if (event == wci.EVENT_BUTTON_RETURN) \
-                    or (event == wci.EVENT_EXIT_PLUGIN) \
-                    or (event == wci.EVENT_NEXT_PLUGIN_REQUESTED):
-                wcd.setBrightness(self.wake_brightness)
-                wcd.show()
-                self.skip_sleep = False
-                return
-            if event == wci.EVENT_BUTTON_RIGHT:
-                time.sleep(wci.lock_time)
-                self.color_selection(wcd, wci)
+    async def sample_brightness(self):
+        """
+        Reads the brightness sensor (within a worker thread) and stores the resulting brightness
+        """
+        try:
+            sensorCurrent = await wcruntime.run_blocking(lambda: self.sensor.lux)
+        except IOError as e:
+            print(e)
+            return
+        if isinstance(sensorCurrent, float):
+            self.sensor_brightness = int(self.brightness_from_lux(sensorCurrent))
 
-    def show_time(self, wcd, wci, animation=None, animation_speed=25):
+    async def show_time(self, wcd, wci, animation=None, animation_speed=25):
         now = datetime.datetime.now()
         # Set background color
         wcd.setColorToAll(self.bg_color, includeMinutes=True)
@@ -223,9 +231,9 @@ class plugin:
         taw_indices = wcd.taw.get_time(now, self.purist)
         wcd.setColorBy1DCoordinates(taw_indices, self.word_color)
         wcd.setMinutes(now, self.minute_color)
-        wcd.show(animation, animation_speed)
+        await wcruntime.show(wcd, animation, animation_speed)
 
-    def color_selection(self, wcd, wci):
+    async def color_selection(self, wcd, wci):
         while True:
             # BEGIN: Rainbow generation as done in rpi_ws281x strandtest example! Thanks to Tony DiCola for providing :)
             if self.rb_pos < 85:
@@ -242,12 +250,12 @@ class plugin:
             wcd.setColorToAll(self.bg_color, includeMinutes=True)
             wcd.setColorBy1DCoordinates(taw_indices, self.word_color)
             wcd.setMinutes(now, self.minute_color)
-            wcd.show()
+            await wcruntime.show(wcd)
             self.rb_pos += 1
             if self.rb_pos == 256: self.rb_pos = 0
-            event = wci.waitForEvent(0.1)
+            event = await wci.waitForEvent(0.1)
             if event != wci.EVENT_INVALID:
-                time.sleep(wci.lock_time)
+                await asyncio.sleep(wci.lock_time)
                 break
         if not self.use_brightness_sensor:
             while True:
@@ -259,11 +267,11 @@ class plugin:
                 wcd.setColorBy1DCoordinates(taw_indices, self.word_color)
                 wcd.setMinutes(now, self.minute_color)
                 wcd.setBrightness(self.brightness_mode_pos)
-                wcd.show()
+                await wcruntime.show(wcd)
                 if self.brightness_mode_pos < abs(self.brightness_change) or self.brightness_mode_pos > 255 - abs(
                         self.brightness_change):
                     self.brightness_change *= -1
-                event = wci.waitForEvent(0.1)
+                event = await wci.waitForEvent(0.1)
                 if event != wci.EVENT_INVALID:
-                    time.sleep(wci.lock_time)
+                    await asyncio.sleep(wci.lock_time)
                     return
@@ -2,8 +2,8 @@ import logging
 import os
 import requests
 import json
-import time
 import wordclock_tools.wordclock_colors as wcc
+import wordclock_tools.wordclock_runtime as wcruntime
 
 
 class plugin:
@@ -37,30 +37,39 @@ class plugin:
             logging.warning('Assumes no temperature sensor to be attached.')
             self.temp_sensor_registered = False
 
-    def run(self, wcd, wci):
+    async def run(self, wcd, wci):
         """
         Displaying expected temperature
         """
-        # Get current forecast
+        # Get current forecast (fetched and read within worker threads, while the event loop keeps running)
         if self.weather_service == 'openweathermap':
-            outdoor_temp = str((json.loads(requests.get('http://api.openweathermap.org/data/2.5/weather?q=' + self.city + '&appid=' + self.api_key + '&units=metric').text))['main']['temp'])
+            response = await wcruntime.run_blocking(requests.get, 'http://api.openweathermap.org/data/2.5/weather?q=' + self.city + '&appid=' + self.api_key + '&units=metric')
+            outdoor_temp = str((json.loads(response.text))['main']['temp'])
         elif self.weather_service == 'meteoswiss':
-            outdoor_temp = (json.loads(requests.get('https://www.meteoschweiz.admin.ch/product/output/weather-widget/forecast/version__20210514_1034/de/' + self.zipcode + '00.json', headers={'referer': 'https://www.meteoschweiz.admin.ch/home/service-und-publikationen/produkte.html'}).text))['data']['current']['temperature']
+            response = await wcruntime.run_blocking(lambda: requests.get('https://www.meteoschweiz.admin.ch/product/output/weather-widget/forecast/version__20210514_1034/de/' + self.zipcode + '00.json', headers={'referer': 'https://www.meteoschweiz.admin.ch/home/service-und-publikationen/produkte.html'}))
+            outdoor_temp = (json.loads(response.text))['data']['current']['temperature']
         else:
             logging.warning('No valid weather_forecast found!')
             return
         if self.temp_sensor_registered:
             try:
-                indoor_temp = str(int(round(am2302_ths.get_temperature(self.pin_temp_sensor))))
-                wcd.showText(outdoor_temp + '*', count=1, fps=8)
-                wcd.showText(indoor_temp + '*', count=1, fg_color=wcc.GREEN, fps=8)
-                wcd.showText(outdoor_temp + '*', count=1, fps=8)
-                wcd.showText(indoor_temp + '*', count=1, fg_color=wcc.GREEN, fps=8)
+                import am2302_ths
+                indoor_temp = str(int(round(await wcruntime.run_blocking(am2302_ths.get_temperature, self.pin_temp_sensor))))
+                await wcruntime.run_blocking(self.show_temperatures, wcd, outdoor_temp, indoor_temp)
             except:
                 logging.error('Failed to read temperature sensor!')
-                wcd.showText(outdoor_temp + '*   ' + outdoor_temp + '*   ' + outdoor_temp + '*', count=1, fps=8)
+                await wcruntime.run_blocking(lambda: wcd.showText(outdoor_temp + '*   ' + outdoor_temp + '*   ' + outdoor_temp + '*', count=1, fps=8))
         else:
-            wcd.showText(outdoor_temp + '*   ' + outdoor_temp + '*   ' + outdoor_temp + '*', count=1, fps=8)
+            await wcruntime.run_blocking(lambda: wcd.showText(outdoor_temp + '*   ' + outdoor_temp + '*   ' + outdoor_temp + '*', count=1, fps=8))
 
-        if wci.waitForExit(1.0):
+        if await wci.waitForExit(1.0):
             return
+
+    def show_temperatures(self, wcd, outdoor_temp, indoor_temp):
+        """
+        Scrolls outdoor and indoor temperature alternately (blocks until shown)
+        """
+        wcd.showText(outdoor_temp + '*', count=1, fps=8)
+        wcd.showText(indoor_temp + '*', count=1, fg_color=wcc.GREEN, fps=8)
+        wcd.showText(outdoor_temp + '*', count=1, fps=8)
+        wcd.showText(indoor_temp + '*', count=1, fg_color=wcc.GREEN, fps=8)
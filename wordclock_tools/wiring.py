@@ -1,5 +1,6 @@
 import ast
 import logging
+import numpy as np
 
 class wiring:
     """
@@ -35,7 +36,7 @@ class wiring:
         logging.info('  Num of LEDs: ' + str(self.LED_COUNT))
         logging.info('  Wiring layout: ' + str(wiring_layout))
 
-        if config.getboolean('wordclock', 'developer_mode'):
+        if config.getboolean('wordclock', 'developer_mode') and not config.getboolean('wordclock', 'headless'):
             self.wcl = gtk_wiring(self.WCA_WIDTH, self.WCA_HEIGHT)
             logging.warning('Developer mode overwrites wiring layout to gtk_wiring!')
         elif wiring_layout == 'bernds_wiring':
@@ -58,11 +59,42 @@ class wiring:
         elif wiring_layout == 'webdisaster_wiring':
             self.wcl = webdisaster_wiring(self.WCA_WIDTH, self.WCA_HEIGHT)
         elif wiring_layout == 'momonunu_wiring':
-            self.wcl = momonunu_wiring(self.self.WCA_WIDTH, self.WCA_HEIGHT)
+            self.wcl = momonunu_wiring(self.WCA_WIDTH, self.WCA_HEIGHT)
         else:
             logging.warning('No valid wiring layout found. Falling back to default!')
             self.wcl = bernds_wiring(self.WCA_WIDTH, self.WCA_HEIGHT)
 
+        self.compile()
+
+    def compile(self):
+        """
+        Compiles the selected wiring layout once into flat index arrays:
+          wca_indices: Strip index of each WCA cell, shape (WCA_WIDTH, WCA_HEIGHT)
+          minute_indices: Strip indices of the minutes 1, 2, 3 and 4
+          misc_indices: Strip indices of all remaining (unused) LEDs
+          strip_map: Position of each strip index within a flat screen buffer, which
+                     holds the WCA cells (column by column), the minutes and the misc LEDs
+        Rendering a frame is then a single gather: buffer[strip_map]
+        """
+        self.wca_indices = np.array([[self.wcl.getStripIndexFrom2D(x, y) for y in range(self.WCA_HEIGHT)]
+                                     for x in range(self.WCA_WIDTH)], dtype=np.intp)
+        self.minute_indices = np.array([self.wcl.mapMinutes(m) for m in range(1, 5)], dtype=np.intp)
+
+        used_indices = np.concatenate((self.wca_indices.ravel(), self.minute_indices))
+        if used_indices.max() >= self.LED_COUNT:
+            logging.warning('Wiring layout addresses LED ' + str(used_indices.max()) + ', but LED_COUNT is ' +
+                            str(self.LED_COUNT) + '. Extending LED_COUNT accordingly.')
+            self.LED_COUNT = int(used_indices.max()) + 1
+        if len(np.unique(used_indices)) != len(used_indices):
+            logging.error('Wiring layout maps multiple pixels to the same LED!')
+
+        self.misc_indices = np.setdiff1d(np.arange(self.LED_COUNT), used_indices)
+        source_indices = np.concatenate((used_indices, self.misc_indices))
+        self.strip_map = np.zeros(self.LED_COUNT, dtype=np.intp)
+        self.strip_map[source_indices] = np.arange(len(source_indices))
+
+        logging.info('  Unused LEDs: ' + str(len(self.misc_indices)))
+
     def setColorBy1DCoordinate(self, strip, i, color):
         """
         Linear mapping from top-left to bottom right
@@ -89,13 +121,29 @@ class wiring:
         strip.setPixelColor(self.mapMinutes(min), color)
 
     def getStripIndexFrom2D(self, x, y):
-        return self.wcl.getStripIndexFrom2D(x, y)
+        return int(self.wca_indices[x, y])
 
     def mapMinutes(self, min):
         """
         Access minutes (1,2,3,4)
         """
-        return self.wcl.mapMinutes(min)
+        if min < 1 or min > 4:
+            logging.error('Minute index of range. Expected 1,2,3 or 4, but received ' + str(min))
+            return 0
+        return int(self.minute_indices[min - 1])
+
+    def getSourceFromStripIndex(self, index):
+        """
+        Inverse mapping of a strip index
+        Returns ('wca', (x, y)), ('minute', min) or ('misc', i)
+        """
+        source = int(self.strip_map[index])
+        wca_size = self.WCA_WIDTH * self.WCA_HEIGHT
+        if source < wca_size:
+            return 'wca', divmod(source, self.WCA_HEIGHT)
+        elif source < wca_size + 4:
+            return 'minute', source - wca_size + 1
+        return 'misc', source - wca_size - 4
 
 
 class base_wiring:
@@ -312,7 +360,7 @@ class webdisaster_wiring(base_wiring):
         """
         This implementation assumes the minutes to be wired as the last four leds of the led-strip
         """
-        return self.mapMinutesInternalLedsAtEnd(self, min)
+        return self.mapMinutesInternalLedsAtEnd(min)
 
 class momonunu_wiring(base_wiring):
     """
@@ -321,9 +369,9 @@ class momonunu_wiring(base_wiring):
 
     def getStripIndexFrom2D(self, x, y):
         if y % 2 == 0:
-            return (x * WCA_HEIGHT + 2) + (WCA_HEIGHT - y - 1)
+            return (x * self.WCA_HEIGHT + 2) + (self.WCA_HEIGHT - y - 1)
         else:
-            return (x * WCA_HEIGHT + 2) + y
+            return (x * self.WCA_HEIGHT + 2) + y
 
     def mapMinutesInternal(self, min):
         if min == 1:
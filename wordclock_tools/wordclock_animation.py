@@ -0,0 +1,235 @@
+import logging
+import mmap
+import numpy as np
+import struct
+import threading
+
+
+class animation_frames:
+    """
+    All frames of an animation, packed into one array (frames x width x height x 3).
+    Frames are decoded by a background worker, so playback can start, while the remaining
+    frames are still loaded.
+    """
+
+    def __init__(self, wcd, paths, order=None):
+        """
+        paths: Image files of all frames
+        order: Order to load the frames in (e.g. the order of playback), defaults to the order of paths
+        """
+        self.paths = paths
+        self.order = list(range(len(paths))) if order is None else list(order)
+        self.condition = threading.Condition()
+        self.error = None
+        # Duration of each frame is not stored along png-files: Let the caller decide
+        self.duration = 0
+
+        # The resolution of the animation is given by its first frame (clipped to the WCA)
+        first = wcd.decodeImage(paths[self.order[0]])[:wcd.get_wca_width(), :wcd.get_wca_height()]
+        self.frames = np.zeros((len(paths),) + first.shape, dtype=np.uint8)
+        self.frames[self.order[0]] = first
+        self.loaded = np.zeros(len(paths), dtype=bool)
+        self.loaded[self.order[0]] = True
+
+        self.thread = threading.Thread(target=self.load, args=(wcd,), name='wordclock_animation')
+        self.thread.daemon = True
+        self.thread.start()
+
+    @property
+    def nbytes(self):
+        return self.frames.nbytes
+
+    def __len__(self):
+        return len(self.frames)
+
+    def load(self, wcd):
+        for index in self.order[1:]:
+            try:
+                pixels = wcd.decodeImage(self.paths[index])[:self.frames.shape[1], :self.frames.shape[2]]
+                self.frames[index, :pixels.shape[0], :pixels.shape[1]] = pixels
+            except Exception as e:
+                logging.error('Failed to load animation frame ' + self.paths[index])
+                with self.condition:
+                    self.error = e
+                    self.condition.notify_all()
+                return
+            with self.condition:
+                self.loaded[index] = True
+                self.condition.notify_all()
+
+    def getFrame(self, index):
+        """
+        Returns a frame (width x height x 3), waiting until it is loaded
+        """
+        if not self.loaded[index]:
+            with self.condition:
+                while not self.loaded[index]:
+                    if self.error is not None:
+                        raise self.error
+                    self.condition.wait()
+        return self.frames[index]
+
+    def getChanges(self, index, previous=None):
+        """
+        Returns the pixels, which change from frame previous to frame index, as (indices, rgb-values).
+        Frames are stored in full, so indices is None: All pixels of the frame are returned.
+        """
+        return None, self.getFrame(index)
+
+
+# Animation container format: A header, followed by the palette (palette encoding only) and the frames.
+# Each frame is stored in the layout of the WCA (width x height), either as rgb-values (raw encoding),
+# as indices into the palette (palette encoding) or as changes to its previous frame (delta encoding).
+# Delta encoded frames are preceded by a table of (offset, number of changed pixels, keyframe) per frame.
+# Keyframes hold rgb-values of all pixels. Other frames hold the indices (within the frame) of all
+# pixels, which changed compared to the previous frame, followed by their new and their previous
+# rgb-values, so the animation can be played in both directions.
+CONTAINER_MAGIC = b'WCAN'
+CONTAINER_VERSION = 1
+CONTAINER_HEADER = struct.Struct('<4sBBHHIfH')  # magic, version, encoding, width, height, frames, duration, palette size
+ENCODING_RAW = 0
+ENCODING_PALETTE = 1
+ENCODING_DELTA = 2
+DELTA_FRAME = np.dtype([('offset', '<u4'), ('count', '<u4'), ('keyframe', '<u4')])
+DELTA_KEYFRAME_INTERVAL = 16
+
+
+def container_path(animation_dir):
+    """
+    Returns the path of the container of the animation stored as png-files within animation_dir
+    """
+    return animation_dir.rstrip('/') + '.anim'
+
+
+def write_container(path, frames, duration, encoding=None):
+    """
+    Writes frames (frames x width x height x 3) to an animation container.
+    duration: Duration of each frame in seconds (0: Let the caller decide)
+    encoding: ENCODING_RAW, ENCODING_PALETTE or ENCODING_DELTA
+              (default: palette, if the animation has at most 256 colors, else raw)
+    """
+    colors, indices = np.unique(frames.reshape(-1, 3), axis=0, return_inverse=True)
+    if encoding is None:
+        encoding = ENCODING_PALETTE if len(colors) <= 256 else ENCODING_RAW
+    if encoding == ENCODING_PALETTE and len(colors) > 256:
+        raise ValueError('Palette encoding supports up to 256 colors, but the animation has ' + str(len(colors)))
+
+    num_of_frames, width, height = frames.shape[:3]
+    palette_size = len(colors) if encoding == ENCODING_PALETTE else 0
+    with open(path, 'wb') as f:
+        f.write(CONTAINER_HEADER.pack(CONTAINER_MAGIC, CONTAINER_VERSION, encoding, width, height,
+                                      num_of_frames, duration, palette_size))
+        if encoding == ENCODING_PALETTE:
+            f.write(colors.astype(np.uint8).tobytes())
+            f.write(indices.ravel().astype(np.uint8).tobytes())
+        elif encoding == ENCODING_DELTA:
+            f.write(encode_delta(np.ascontiguousarray(frames, dtype=np.uint8)))
+        else:
+            f.write(np.ascontiguousarray(frames, dtype=np.uint8).tobytes())
+
+
+def encode_delta(frames):
+    """
+    Returns the frame table and the data of delta encoded frames
+    """
+    pixels = frames.reshape(len(frames), -1, 3)
+    table = np.zeros(len(frames), dtype=DELTA_FRAME)
+    data = []
+    offset = 0
+    for i in range(len(frames)):
+        if i % DELTA_KEYFRAME_INTERVAL == 0:
+            chunk = pixels[i].tobytes()
+            table[i] = (offset, pixels.shape[1], 1)
+        else:
+            changed = np.flatnonzero((pixels[i] != pixels[i - 1]).any(axis=1))
+            chunk = changed.astype('<u2').tobytes() + pixels[i][changed].tobytes() + pixels[i - 1][changed].tobytes()
+            table[i] = (offset, len(changed), 0)
+        data.append(chunk)
+        offset += len(chunk)
+    return table.tobytes() + b''.join(data)
+
+
+class animation_container:
+    """
+    All frames of an animation, mapped into memory from an animation container (see write_container).
+    Frames of raw encoded containers are returned without copying.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.encoding, self.width, self.height, self.num_of_frames, self.duration, palette_size = \
+            CONTAINER_HEADER.unpack_from(self.mapping)
+        if magic != CONTAINER_MAGIC or version != CONTAINER_VERSION:
+            raise ValueError('Unsupported animation container ' + path)
+
+        offset = CONTAINER_HEADER.size
+        num_of_pixels = self.width * self.height
+        if self.encoding == ENCODING_PALETTE:
+            self.palette = np.frombuffer(self.mapping, dtype=np.uint8, count=3 * palette_size, offset=offset)
+            self.palette = self.palette.reshape(palette_size, 3)
+            offset += 3 * palette_size
+            self.frames = np.frombuffer(self.mapping, dtype=np.uint8, count=self.num_of_frames * num_of_pixels,
+                                        offset=offset).reshape(self.num_of_frames, self.width, self.height)
+        elif self.encoding == ENCODING_RAW:
+            self.frames = np.frombuffer(self.mapping, dtype=np.uint8, count=self.num_of_frames * num_of_pixels * 3,
+                                        offset=offset).reshape(self.num_of_frames, self.width, self.height, 3)
+        elif self.encoding == ENCODING_DELTA:
+            self.table = np.frombuffer(self.mapping, dtype=DELTA_FRAME, count=self.num_of_frames, offset=offset)
+            self.data_offset = offset + self.table.nbytes
+        else:
+            raise ValueError('Unsupported encoding of animation container ' + path)
+
+    @property
+    def nbytes(self):
+        return len(self.mapping)
+
+    def __len__(self):
+        return self.num_of_frames
+
+    def getFrame(self, index):
+        """
+        Returns a frame (width x height x 3)
+        """
+        if self.encoding == ENCODING_PALETTE:
+            return self.palette[self.frames[index]]
+        if self.encoding == ENCODING_DELTA:
+            # Apply all changes since the last keyframe
+            keyframe = index - index % DELTA_KEYFRAME_INTERVAL
+            _, frame = self.getDelta(keyframe)
+            frame = frame.copy()
+            for i in range(keyframe + 1, index + 1):
+                changed, values, _ = self.getDelta(i)
+                frame[changed] = values
+            return frame.reshape(self.width, self.height, 3)
+        return self.frames[index]
+
+    def getChanges(self, index, previous=None):
+        """
+        Returns the pixels, which change from frame previous to frame index, as (indices, rgb-values).
+        indices are flat indices within the frame (x * height + y) or None, if all pixels of the frame are returned.
+        """
+        if self.encoding == ENCODING_DELTA and previous is not None:
+            if previous == index - 1 and not self.table[index]['keyframe']:
+                changed, values, _ = self.getDelta(index)
+                return changed, values
+            if previous == index + 1 and not self.table[previous]['keyframe']:
+                changed, _, values = self.getDelta(previous)
+                return changed, values
+        return None, self.getFrame(index)
+
+    def getDelta(self, index):
+        """
+        Returns the delta encoded frame: (changed pixels, new rgb-values, previous rgb-values) or,
+        for keyframes, (None, rgb-values of all pixels)
+        """
+        offset, count, keyframe = self.table[index].tolist()
+        offset += self.data_offset
+        if keyframe:
+            return None, np.frombuffer(self.mapping, dtype=np.uint8, count=3 * count, offset=offset).reshape(count, 3)
+        changed = np.frombuffer(self.mapping, dtype='<u2', count=count, offset=offset).astype(np.intp)
+        offset += 2 * count
+        values = np.frombuffer(self.mapping, dtype=np.uint8, count=3 * count, offset=offset).reshape(count, 3)
+        previous_values = np.frombuffer(self.mapping, dtype=np.uint8, count=3 * count,
+                                        offset=offset + 3 * count).reshape(count, 3)
+        return changed, values, previous_values
@@ -0,0 +1,123 @@
+import atexit
+import collections
+import json
+import logging
+import numpy as np
+import os
+import threading
+
+
+class lru_cache:
+    """
+    A cache of numpy arrays, bounded by the overall size (in bytes) of its arrays.
+    If full, the least recently used arrays are evicted.
+    Keys need to be tuples of strings and numbers, so the cache can be saved to and loaded from disk.
+    Other objects providing their size as nbytes can be cached as well (but not saved).
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Optional persistence (see persist)
+        self.persist_path = None
+        self.persist_delay = 0.0
+        self.save_timer = None
+
+    def get(self, key):
+        """
+        Returns the array cached for key or None
+        """
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+
+    def put(self, key, value):
+        """
+        Adds an array to the cache. Arrays larger than the whole cache are not cached.
+        """
+        if value.nbytes > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.bytes -= self.entries.pop(key).nbytes
+            self.entries[key] = value
+            self.bytes += value.nbytes
+            while self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= evicted.nbytes
+            if self.persist_path and self.save_timer is None:
+                self.save_timer = threading.Timer(self.persist_delay, self.flush)
+                self.save_timer.daemon = True
+                self.save_timer.start()
+
+    def clear(self):
+        """
+        Evicts all cached arrays
+        """
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def persist(self, path, delay=60.0):
+        """
+        Saves the cache to a file delay seconds after it has been changed (further changes within
+        this time are saved along) and at exit, so cache misses do not rewrite the file each time
+        """
+        self.persist_path = path
+        self.persist_delay = delay
+        atexit.register(self.flush)
+
+    def flush(self):
+        """
+        Saves pending changes of a persisted cache right away
+        """
+        with self.lock:
+            timer, self.save_timer = self.save_timer, None
+        if timer is None:
+            return
+        timer.cancel()
+        try:
+            self.save(self.persist_path)
+        except Exception:
+            logging.warning('Failed to save cache to ' + self.persist_path)
+
+    def save(self, path):
+        """
+        Saves all cached arrays to a file (written atomically)
+        """
+        with self.lock:
+            entries = list(self.entries.items())
+        arrays = {'array_' + str(i): value for i, (_, value) in enumerate(entries)}
+        arrays['keys'] = np.array(json.dumps([list(key) for key, _ in entries]))
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(temp_path, path)
+
+    def load(self, path):
+        """
+        Adds the arrays saved to a file to the cache (e.g. from a previous run)
+        """
+        if not os.path.exists(path):
+            return
+        try:
+            with np.load(path, allow_pickle=False) as arrays:
+                keys = json.loads(str(arrays['keys']))
+                for i, key in enumerate(keys):
+                    self.put(tuple(key), arrays['array_' + str(i)])
+            logging.info('Loaded ' + str(len(keys)) + ' cached entries from ' + path)
+        except Exception:
+            logging.warning('Failed to load cache from ' + path)
+
+    def getStatistics(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'bytes': self.bytes, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses}
@@ -21,6 +21,12 @@ class Color:
     def brightness(self):
         return int((self.r + self.g + self.b)/3)
 
+    def rgb(self):
+        """
+        Returns the color as (r, g, b)-tuple, e.g. to be written into a framebuffer
+        """
+        return (self.r, self.g, self.b)
+
 # Define colors which are available for the wcd. Currently: Alphabetic order
 BLACK = Color(  0,  0,  0)
 BLUE  = Color(  0,  0,255)
@@ -33,14 +39,6 @@ YELLOW= Color(255,255,  0)
 ORANGE= Color(212,165,  25)
 LIME  = Color(104,255, 74)
 
-scrollenable = False
-scrolltext = ""
-scrolldate = ""
-scrolltime = ""
-scrolldatetime = 0
-scrollrepeat = 0
-scrollactive = False
-
 # Summarize colors: [BLACK->WHITE, RED->BLUE (rainbow)]
 colors = [BLACK, WHITE, WWHITE, RED, YELLOW, LIME, GREEN, BLUE]
 num_of_colors = len(colors)
@@ -44,5 +44,8 @@ class wordclock_config:
     def getint(self, *args):
         return self.request("getint", *args)
 
+    def getfloat(self, *args):
+        return self.request("getfloat", *args)
+
     def get(self, *args):
         return self.request("get", *args)
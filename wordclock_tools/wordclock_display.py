@@ -1,13 +1,14 @@
 import configparser
 import fontdemo
+import glob
 import itertools
 import logging
+import numpy as np
 import os
-from copy import deepcopy
 from PIL import Image
 from . import wiring
-from time import sleep
-from threading import Lock
+from monotonic import monotonic as _time
+from threading import Lock, RLock
 import wordclock_plugins.time_default.time_bavarian as time_bavarian
 import wordclock_plugins.time_default.time_dutch as time_dutch
 import wordclock_plugins.time_default.time_english as time_english
@@ -22,9 +23,14 @@ import wordclock_plugins.time_default.time_swabian2 as time_swabian2
 import wordclock_plugins.time_default.time_swiss_german as time_swiss_german
 import wordclock_plugins.time_default.time_swiss_german2 as time_swiss_german2
 import wordclock_plugins.time_default.time_swedish as time_swedish
+import wordclock_tools.wordclock_animation as wordclock_animation
+import wordclock_tools.wordclock_cache as wordclock_cache
 import wordclock_tools.wordclock_colors as wcc
+import wordclock_tools.wordclock_icons as wordclock_icons
+import wordclock_tools.wordclock_metrics as wordclock_metrics
+import wordclock_tools.wordclock_overlay as wordclock_overlay
+import wordclock_tools.wordclock_renderer as wordclock_renderer
 import wordclock_tools.wordclock_screen as wordclock_screen
-import colorsys
 
 
 class wordclock_display:
@@ -40,17 +46,40 @@ class wordclock_display:
         # Get the wordclocks wiring-layout
         self.wcl = wiring.wiring(config)
         self.wci = wci
-
+        self.strip_indices = np.arange(self.wcl.LED_COUNT)
+
+        # Last frame sent to the strip (in strip order, brightness applied) and render statistics
+        self.strip_frame = None
+        self.gather_frame = np.zeros((self.wcl.LED_COUNT, 3), dtype=np.uint8)
+        self.render_frame = np.zeros((self.wcl.LED_COUNT, 3), dtype=np.uint8)
+        # Preallocated buffers to diff a rendered frame against the frame currently shown
+        self.dirty_mask = np.zeros((self.wcl.LED_COUNT, 3), dtype=bool)
+        self.dirty_leds = np.zeros(self.wcl.LED_COUNT, dtype=bool)
+        self.changed_colors = np.zeros((self.wcl.LED_COUNT, 3), dtype=np.uint8)
+        self.frames_rendered = 0
+        self.metrics = wordclock_metrics.wordclock_metrics(config.getboolean('wordclock_display', 'collect_metrics'))
+        self.frames_skipped = 0
+        self.pixels_changed = 0
+
+        # Double buffering: Plugins draw into the back buffer (transition_cache_next), show() publishes
+        # it as front buffer (transition_cache_curr), which is rendered by the renderer.
         self.transition_cache_next = wordclock_screen.wordclock_screen(self)
         self.transition_cache_curr = wordclock_screen.wordclock_screen(self)
+        self.buffer_lock = RLock()
 
         self.config = config
         self.base_path = config.get('wordclock', 'base_path')
         self.mutex = Lock()
 
+        # Brightness is applied using a lookup table, which is only rebuilt on brightness changes
+        self.brightness = None
+        self.brightness_gamma = float(config.get('wordclock_display', 'brightness_gamma'))
         self.setBrightness(config.getint('wordclock_display', 'brightness'))
 
-        if config.getboolean('wordclock', 'developer_mode'):
+        if config.getboolean('wordclock', 'headless'):
+            import wordclock_tools.wordclock_strip_headless as wcs_headless
+            self.strip = wcs_headless.wordclock_strip_headless(self.wcl, config.get('wordclock', 'headless_recording'))
+        elif config.getboolean('wordclock', 'developer_mode'):
             import wordclock_tools.wordclock_strip_wx as wcs_wx
             self.strip = wcs_wx.WxStrip(wci)
         else:
@@ -62,6 +91,29 @@ class wordclock_display:
         else:
             self.default_font = os.path.join('/usr/share/fonts/truetype/freefont/', config.get('wordclock_display', 'default_font') + '.ttf')
 
+        # Cache of rendered texts, keyed by (text, hash of the font file, size). Optionally persisted to disk.
+        self.text_cache = wordclock_cache.lru_cache(config.getint('wordclock_display', 'text_cache_size'))
+        self.text_cache_file = config.get('wordclock_display', 'text_cache_file')
+        if self.text_cache_file:
+            self.text_cache.load(self.text_cache_file)
+            self.text_cache.persist(self.text_cache_file)
+
+        # Cache of decoded images, keyed by (path, modification time)
+        self.image_cache = wordclock_cache.lru_cache(config.getint('wordclock_display', 'image_cache_size'))
+        # Icons of all activated plugins (see buildIconAtlas)
+        self.icon_atlas = None
+        # Cache of loaded animations, keyed by (directory, modification time)
+        self.animation_cache = wordclock_cache.lru_cache(config.getint('wordclock_display', 'animation_cache_size'))
+
+        # Pool of opened fonts, keyed by (path, size). The default font is opened right away.
+        self.fonts = {}
+        self.font_hashes = {}
+        self.fonts_lock = Lock()
+        try:
+            self.getFont(self.default_font)
+        except Exception:
+            logging.warning('Failed to load default font ' + self.default_font)
+
         self.strip.begin()
 
         # Choose default fgcolor
@@ -148,6 +200,13 @@ class wordclock_display:
 
         self.fps = self.config.getint('wordclock', 'animation_fps')
 
+        # Text scrolling above the content of the current plugin (e.g. scheduled via the web interface)
+        self.overlay = wordclock_overlay.wordclock_overlay(self)
+
+        # The renderer owns the strip from here on
+        self.renderer = wordclock_renderer.wordclock_renderer(self, self.fps,
+                                                              threaded=config.getboolean('wordclock', 'render_thread'))
+
 
     def getBrightness(self):
         """
@@ -159,7 +218,19 @@ class wordclock_display:
         """
         Sets the provided brightness to the wordclock display
         """
-        self.brightness = max(min(brightness, 255), 0)
+        brightness = int(max(min(brightness, 255), 0))
+        if brightness != self.brightness:
+            self.brightness = brightness
+            self.brightness_lut = self.build_brightness_lut(brightness)
+
+    def build_brightness_lut(self, brightness):
+        """
+        Returns a table, which maps each 8bit color value to its value at the given brightness
+        brightness_gamma = 1.0 scales linearly, larger values (e.g. 2.2) result in perceptually even steps
+        """
+        scale = (brightness / 255.0) ** self.brightness_gamma
+        # Small epsilon avoids e.g. 254.99999 being truncated to 254
+        return np.floor(np.arange(256) * scale + 1e-6).astype(np.uint8)
 
     def setBrightnessAndShow(self, brightness):
         """
@@ -167,24 +238,24 @@ class wordclock_display:
         """
         with self.mutex:
             self.setBrightness(brightness)
-        self.show()
+        self.refresh()
 
     def setColorBy1DCoordinates(self, ledCoordinates, color):
         """
         Sets a pixel at given 1D coordinates
         """
-        for i in ledCoordinates:
-            self.setColorBy2DCoordinates(i % self.get_wca_width(), i // self.get_wca_width(), color)
+        ledCoordinates = np.asarray(ledCoordinates, dtype=int)
+        self.transition_cache_next.matrix[ledCoordinates % self.get_wca_width(), ledCoordinates // self.get_wca_width()] = color.rgb()
 
     def setColorBy2DCoordinates(self, x, y, color):
         """
         Sets a pixel at given 2D coordinates
         """
-        self.transition_cache_next.matrix[x][y] = color
+        self.transition_cache_next.matrix[x, y] = color.rgb()
 
     def setColorByMinute(self, min, color):
         if min >= 0 and min < 4:
-            self.transition_cache_next.minutes[min] = color
+            self.transition_cache_next.minutes[min] = color.rgb()
 
     def get_wca_height(self):
         """
@@ -216,12 +287,9 @@ class wordclock_display:
         Sets a given color to all leds
         If includeMinutes is set to True, color will also be applied to the minute-leds.
         """
-        for x in range(self.get_wca_width()):
-            for y in range(self.get_wca_height()):
-                self.transition_cache_next.matrix[x][y] = color
+        self.transition_cache_next.matrix[:, :] = color.rgb()
         if includeMinutes:
-            for m in range(4):
-                self.transition_cache_next.minutes[m] = color
+            self.transition_cache_next.minutes[:] = color.rgb()
 
     def setColorTemperatureToAll(self, temperature, includeMinutes=True):
         """
@@ -236,6 +304,16 @@ class wordclock_display:
         """
         self.setColorToAll(wcc.BLACK, True)
 
+    def buildIconAtlas(self, plugins):
+        """
+        Packs the general icons and the icons of the given plugins (at the resolution of the WCA) into an atlas.
+        showIcon and setImage then take these icons from the atlas without accessing any file.
+        """
+        paths = sorted(glob.glob(os.path.join(self.base_path, 'icons', self.dispRes(), '*.png')))
+        for plugin in plugins:
+            paths += sorted(glob.glob(os.path.join(self.base_path, 'wordclock_plugins', plugin, 'icons', self.dispRes(), '*.png')))
+        self.icon_atlas = wordclock_icons.icon_atlas(self, paths, self.config.get('wordclock_display', 'icon_atlas_file'))
+
     def showIcon(self, plugin, iconName):
         """
         Dispays an icon with a specified name.
@@ -244,42 +322,162 @@ class wordclock_display:
         self.setImage(
             self.base_path + '/wordclock_plugins/' + plugin + '/icons/' + self.dispRes() + '/' + iconName + '.png')
 
+    def loadImage(self, absPathToImage):
+        """
+        Returns the image (provided as absolute path) as array of rgb-values (width x height x 3),
+        ready to be copied into the WCA. Decoded images are cached (by path and modification time).
+        """
+        path = os.path.abspath(absPathToImage)
+        if self.icon_atlas is not None:
+            pixels = self.icon_atlas.get(path)
+            if pixels is not None:
+                return pixels
+        key = (path, os.path.getmtime(path))
+        pixels = self.image_cache.get(key)
+        if pixels is None:
+            pixels = self.decodeImage(path)
+            self.image_cache.put(key, pixels)
+        return pixels
+
+    @staticmethod
+    def decodeImage(path):
+        """
+        Decodes an image file into an array of rgb-values (width x height x 3)
+        """
+        with Image.open(path) as img:
+            return np.ascontiguousarray(np.asarray(img.convert('RGB'), dtype=np.uint8).transpose(1, 0, 2))
+
     def setImage(self, absPathToImage):
         """
         Set image (provided as absolute path) to current display
         """
-        img = Image.open(absPathToImage)
-        width, height = img.size
-        for x in range(0, width):
-            for y in range(0, height):
-                rgb_img = img.convert('RGB')
-                r, g, b = rgb_img.getpixel((x, y))
-                self.setColorBy2DCoordinates(x, y, wcc.Color(r, g, b))
+        pixels = self.loadImage(absPathToImage)[:self.wcl.WCA_WIDTH, :self.wcl.WCA_HEIGHT]
+        self.transition_cache_next.matrix[:pixels.shape[0], :pixels.shape[1]] = pixels
         self.show()
 
-    def animate(self, plugin, animationName, fps=10, count=1, invert=False):
+    def animate(self, plugin, animationName, fps=None, count=1, invert=False):
         """
         Runs an animation
         plugin: Plugin-name
         num_of_frames: Number of frames to be displayed
         count: Number of runs
-        fps: frames per second
+        fps: frames per second (default: as stored in the animation container, else 10)
         invert: Invert order of animation
         """
         animation_dir = self.base_path + '/wordclock_plugins/' + plugin + '/animations/' + self.dispRes() + '/' + animationName + '/'
-        num_of_frames = len([file_count for file_count in os.listdir(animation_dir)])
+        frames = self.loadAnimation(animation_dir, invert)
+        if fps is None:
+            fps = 1.0 / frames.duration if frames.duration > 0 else 10
 
         if invert:
-            animation_range = list(range(num_of_frames - 1, -1, -1))
+            animation_range = list(range(len(frames) - 1, -1, -1))
         else:
-            animation_range = list(range(0, num_of_frames))
+            animation_range = list(range(0, len(frames)))
 
+        # Frames are shown at fixed deadlines, so the time to show a frame does not slow down the animation
+        deadline = _time()
+        previous = None
         for _ in range(count):
             for i in animation_range:
-                self.setImage(animation_dir + str(i).zfill(3) + '.png')
-                if self.wci.waitForExit(1.0 / fps):
+                # The back buffer still holds the previous frame: Delta encoded frames only update changed pixels.
+                # As for png-files, frames are clipped to the WCA.
+                changed, values = frames.getChanges(i, previous)
+                if changed is None:
+                    values = values[:self.get_wca_width(), :self.get_wca_height()]
+                    self.transition_cache_next.matrix[:values.shape[0], :values.shape[1]] = values
+                else:
+                    x, y = np.divmod(changed, frames.height)
+                    if frames.width > self.get_wca_width() or frames.height > self.get_wca_height():
+                        inside = (x < self.get_wca_width()) & (y < self.get_wca_height())
+                        x, y, values = x[inside], y[inside], values[inside]
+                    self.transition_cache_next.matrix[x, y] = values
+                previous = i
+                self.show()
+                deadline += 1.0 / fps
+                if self.wci.waitForExit(max(deadline - _time(), 0)):
                     return
 
+    def loadAnimation(self, animation_dir, invert=False):
+        """
+        Returns all frames of an animation: Mapped from its container (see convert_animation.py), if available,
+        else loaded in the background from the files 000.png, 001.png, ... Loaded animations are cached.
+        invert: Load the frames in inverted order (to be played inverted)
+        """
+        container = wordclock_animation.container_path(animation_dir)
+        if os.path.exists(container):
+            key = (container, os.path.getmtime(container))
+            frames = self.animation_cache.get(key)
+            if frames is None:
+                frames = wordclock_animation.animation_container(container)
+                self.animation_cache.put(key, frames)
+            return frames
+
+        key = (animation_dir, os.path.getmtime(animation_dir))
+        frames = self.animation_cache.get(key)
+        if frames is None:
+            num_of_frames = len([file_count for file_count in os.listdir(animation_dir)])
+            paths = [animation_dir + str(i).zfill(3) + '.png' for i in range(num_of_frames)]
+            frames = wordclock_animation.animation_frames(self, paths, reversed(range(num_of_frames)) if invert else None)
+            self.animation_cache.put(key, frames)
+        return frames
+
+    def getFont(self, font, size=None):
+        """
+        Returns the opened font of the given path and size (default: height of the WCA) from the font pool.
+        Pooled fonts are shared by all threads (plugin, web interface, overlay): Their FreeType access is locked.
+        """
+        if size is None:
+            size = self.wcl.WCA_HEIGHT
+        with self.fonts_lock:
+            if (font, size) not in self.fonts:
+                if font not in self.font_hashes:
+                    self.font_hashes[font] = fontdemo.file_hash(font)
+                self.fonts[(font, size)] = self.loadFontAtlas(font, size) or fontdemo.Font(font, size)
+            return self.fonts[(font, size)]
+
+    def loadFontAtlas(self, font, size):
+        """
+        Returns the font from its precompiled glyph atlas (see build_font_atlas.py) or None, if not available
+        """
+        atlas_file = fontdemo.atlas_path(font, size, os.path.join(self.base_path, fontdemo.ATLAS_DIR))
+        if not os.path.exists(atlas_file):
+            return None
+        try:
+            fnt = fontdemo.AtlasFont(font, size, atlas_file)
+        except Exception:
+            logging.warning('Failed to load glyph atlas ' + atlas_file)
+            return None
+        if fnt.font_hash != self.font_hashes[font]:
+            logging.warning('Glyph atlas ' + atlas_file + ' is outdated. Please rebuild it using build_font_atlas.py')
+            return None
+        logging.info('Loaded glyph atlas ' + atlas_file)
+        return fnt
+
+    def renderText(self, text, font=None):
+        """
+        Returns the text rendered with the given font (default: default_font) as array of pixels (rows x columns)
+        Rendered texts are cached and must not be modified.
+        """
+        if font is None:
+            font = self.default_font
+        fnt = self.getFont(font)
+        key = (text, self.font_hashes[font].hex(), fnt.size)
+        pixels = self.text_cache.get(key)
+        if pixels is None:
+            pixels = fnt.rasterize(fnt.shape(text)).array
+            self.text_cache.put(key, pixels)
+        return pixels
+
+    def renderTextStrip(self, text, font, fg_color, bg_color):
+        """
+        Returns the text rendered in the given colors as strip of shape (text width, rows, 3) to be scrolled
+        through the WCA: Each scroll frame is a window into this strip
+        """
+        text_as_pixel = self.renderText(text, font)
+        rows = min(text_as_pixel.shape[0], self.wcl.WCA_HEIGHT)
+        return np.where(text_as_pixel[:rows].T[:, :, np.newaxis],
+                        np.array(fg_color.rgb(), dtype=np.uint8), np.array(bg_color.rgb(), dtype=np.uint8))
+
     def showText(self, text, font=None, fg_color=None, bg_color=None, fps=10, count=1):
         """
         Display text on display
@@ -293,10 +491,8 @@ class wordclock_display:
 
         text = '    ' + text + '    '
 
-        fnt = fontdemo.Font(font, self.wcl.WCA_HEIGHT)
-
-        text_width, text_height, text_max_descent = fnt.text_dimensions(text)
-        text_as_pixel = fnt.render_text(text)
+        scroll_strip = self.renderTextStrip(text, font, fg_color, bg_color)
+        text_width, rows = scroll_strip.shape[:2]
 
         # Display text count times
         for i in range(count):
@@ -306,9 +502,7 @@ class wordclock_display:
 
             # Assure here correct rendering, if the text does not fill the whole display
             render_range = self.wcl.WCA_WIDTH if self.wcl.WCA_WIDTH < text_width else text_width
-            for y in range(text_height):
-                for x in range(render_range):
-                    self.setColorBy2DCoordinates(x, y, fg_color if text_as_pixel.pixels[y * text_width + x] else bg_color)
+            self.transition_cache_next.matrix[:render_range, :rows] = scroll_strip[:render_range]
 
             # Show first frame for 0.5 seconds
             self.show()
@@ -317,60 +511,127 @@ class wordclock_display:
 
             # Shift text from left to right to show all.
             for cur_offset in range(text_width - self.wcl.WCA_WIDTH + 1):
-                for y in range(text_height):
-                    for x in range(self.wcl.WCA_WIDTH):
-                        self.setColorBy2DCoordinates(x, y, fg_color if text_as_pixel.pixels[y * text_width + x + cur_offset] else bg_color)
+                self.transition_cache_next.matrix[:, :rows] = scroll_strip[cur_offset:cur_offset + self.wcl.WCA_WIDTH]
                 self.show()
                 if self.wci.waitForExit(1.0 / fps):
                     return
 
     def setMinutes(self, time, color):
         if time.minute % 5 != 0:
-            for i in range(0, time.minute % 5):
-                self.transition_cache_next.minutes[i] = color
+            self.transition_cache_next.minutes[:time.minute % 5] = color.rgb()
 
-    def apply_brightness(self, color):
-        [h, s, v] = colorsys.rgb_to_hsv(color.r/255.0, color.g/255.0, color.b/255.0)
-        [r, g, b] = colorsys.hsv_to_rgb(h, s, v * self.brightness/255.0)
-        return wcc.Color(int(r*255.0), int(g*255.0), int(b*255.0))
+    def apply_brightness(self, frame):
+        """
+        Scales an array of rgb-values by the current brightness
+        (equivalent to scaling the value-channel in HSV-space)
+        """
+        return self.brightness_lut[frame]
+
+    def swapBuffers(self):
+        """
+        Publishes the back buffer as new front buffer. The previous front buffer is recycled
+        as back buffer and initialized with the published content (nothing is allocated).
+        """
+        with self.buffer_lock:
+            self.transition_cache_curr, self.transition_cache_next = self.transition_cache_next, self.transition_cache_curr
+            np.copyto(self.transition_cache_next.buffer, self.transition_cache_curr.buffer)
+
+    def getSnapshot(self):
+        """
+        Returns a consistent copy of the currently displayed WCA and minutes (e.g. for the web interface)
+        """
+        with self.buffer_lock:
+            return self.transition_cache_curr.matrix.copy(), self.transition_cache_curr.minutes.copy()
+
+    def getRenderStatistics(self):
+        """
+        Returns counters of rendered frames, skipped (identical) frames and updated pixels
+        as well as the renderer's dropped frames and jitter
+        """
+        statistics = {'frames_rendered': self.frames_rendered,
+                      'frames_skipped': self.frames_skipped,
+                      'pixels_changed': self.pixels_changed}
+        statistics.update(self.renderer.getStatistics())
+        return statistics
 
     def render_transition_step(self, transition_cache_step):
-        for x in range(self.get_wca_width()):
-            for y in range(self.get_wca_height()):
-                self.wcl.setColorBy2DCoordinates(self.strip, x, y, self.apply_brightness(transition_cache_step.matrix[x][y]))
-        for m in range(4):
-            self.wcl.setColorToMinute(self.strip, m + 1, self.apply_brightness(transition_cache_step.minutes[m]))
-        self.strip.show()
+        """
+        Renders a screen (or the front buffer, if None) to the strip. Called by the renderer only.
+        """
+        # Timestamps are only taken, if metrics are enabled
+        timed = self.metrics.enabled
+        with self.buffer_lock:
+            if transition_cache_step is None:
+                transition_cache_step = self.transition_cache_curr
+            transition_cache_step = self.overlay.composite(transition_cache_step)
+
+            # Map the whole screen buffer to the strip's order with a single gather (see wiring.compile)
+            # and apply the brightness. Both steps write into preallocated frames.
+            if timed: t_start = self.metrics.timestamp()
+            frame = self.render_frame
+            np.take(transition_cache_step.buffer, self.wcl.strip_map, axis=0, out=self.gather_frame)
+            if timed: t_wiring = self.metrics.timestamp()
+            np.take(self.brightness_lut, self.gather_frame, out=frame)
+            if timed: t_brightness = self.metrics.timestamp()
+
+            # Only update pixels, which differ from the frame currently shown. Identical frames are skipped.
+            # Apart from the indices of the changed LEDs, the diff works on preallocated buffers.
+            if self.strip_frame is None:
+                changed = self.strip_indices
+                colors = frame
+                self.strip_frame = frame.copy()
+            else:
+                np.not_equal(frame, self.strip_frame, out=self.dirty_mask)
+                np.any(self.dirty_mask, axis=1, out=self.dirty_leds)
+                changed = np.flatnonzero(self.dirty_leds)
+                if changed.size == 0:
+                    self.frames_skipped += 1
+                    if timed:
+                        self.metrics.addStage('wiring', t_wiring - t_start)
+                        self.metrics.addStage('brightness', t_brightness - t_wiring)
+                        self.metrics.addStage('diff', self.metrics.timestamp() - t_brightness)
+                    return
+                colors = self.changed_colors[:changed.size]
+                np.take(frame, changed, axis=0, out=colors)
+                self.strip_frame[changed] = colors
+            if timed: t_diff = self.metrics.timestamp()
+
+            self.strip.setPixelColors(changed, colors)
+            if timed: t_update = self.metrics.timestamp()
+            self.strip.show()
+            self.frames_rendered += 1
+            self.pixels_changed += changed.size
+
+            if timed:
+                t_show = self.metrics.timestamp()
+                self.metrics.addStage('wiring', t_wiring - t_start)
+                self.metrics.addStage('brightness', t_brightness - t_wiring)
+                self.metrics.addStage('diff', t_diff - t_brightness)
+                self.metrics.addStage('strip_update', t_update - t_diff)
+                self.metrics.addStage('strip_show', t_show - t_update)
+                self.metrics.addFrame(t_show)
 
     def show(self, animation = None, animation_speed = 5):
         """
         This function provides the current color settings to the LEDs
+        Rendering (and any transition) is performed by the renderer, which does not block the caller,
+        if running in a dedicated thread.
+        animation: Name of a transition (see wordclock_transitions), e.g. crossfade, fadeOutIn, typewriter, wipe or wordMorph
         """
         animation = None if self.fps == 0 else animation
 
-        if animation == 'typewriter':
-            transition_cache = wordclock_screen.wordclock_screen(self)
-            for y in range(self.get_wca_height()):
-                for x in range(self.get_wca_width()):
-                    if self.transition_cache_next.matrix[x][y] is not wcc.BLACK:
-                        transition_cache.matrix[x][y] = self.transition_cache_next.matrix[x][y]
-                        self.render_transition_step(transition_cache)
-                        sleep(1.0/animation_speed)
-            self.transition_cache_curr = deepcopy(self.transition_cache_next)
-            self.render_transition_step(self.transition_cache_curr)
-        elif animation == 'fadeOutIn':
-            with self.mutex:
-                brightness = self.getBrightness()
-                while self.getBrightness() > 0:
-                    self.setBrightness(self.getBrightness() - animation_speed)
-                    self.render_transition_step(self.transition_cache_curr)
-                    sleep(1.0/self.fps)
-                self.transition_cache_curr = deepcopy(self.transition_cache_next)
-                while self.getBrightness() < brightness:
-                    self.setBrightness(self.getBrightness() + animation_speed)
-                    self.render_transition_step(self.transition_cache_curr)
-                    sleep(1.0/self.fps)
+        if animation in self.renderer.transitions:
+            with self.buffer_lock:
+                transition = self.renderer.createTransition(animation, self.transition_cache_curr,
+                                                            self.transition_cache_next, animation_speed)
+                self.swapBuffers()
+            self.renderer.submit(transition)
         else: # no animation
-            self.transition_cache_curr = deepcopy(self.transition_cache_next)
-            self.render_transition_step(self.transition_cache_curr)
+            self.swapBuffers()
+            self.renderer.submitFrame()
 
+    def refresh(self):
+        """
+        Renders the currently shown content again, e.g. to apply a new brightness
+        """
+        self.renderer.submitFrame()
@@ -0,0 +1,67 @@
+import json
+import logging
+import numpy as np
+import os
+
+
+class icon_atlas:
+    """
+    Icons, decoded once and packed into one array (icons x width x height x 3) at the resolution of the WCA.
+    Optionally, the atlas is saved to a file and reused, as long as no icon has been added, removed or modified.
+    """
+
+    def __init__(self, wcd, paths=(), cache_file=None):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.index = {path: i for i, path in enumerate(self.paths)}
+        mtimes = np.array([os.path.getmtime(path) for path in self.paths], dtype=np.float64)
+
+        if not (cache_file and self.load(cache_file, mtimes)):
+            self.icons = np.zeros((len(self.paths), wcd.get_wca_width(), wcd.get_wca_height(), 3), dtype=np.uint8)
+            self.sizes = np.zeros((len(self.paths), 2), dtype=np.int64)
+            for i, path in enumerate(self.paths):
+                pixels = wcd.decodeImage(path)[:wcd.get_wca_width(), :wcd.get_wca_height()]
+                self.icons[i, :pixels.shape[0], :pixels.shape[1]] = pixels
+                self.sizes[i] = pixels.shape[:2]
+            if cache_file:
+                self.save(cache_file, mtimes)
+        logging.info('Icon atlas holds ' + str(len(self.paths)) + ' icons (' + str(self.icons.nbytes) + ' bytes)')
+
+    def get(self, path):
+        """
+        Returns the icon of the given file as array of rgb-values (width x height x 3) or None, if not within the atlas
+        """
+        i = self.index.get(path)
+        if i is None:
+            return None
+        width, height = self.sizes[i]
+        return self.icons[i, :width, :height]
+
+    def load(self, cache_file, mtimes):
+        """
+        Loads the atlas from a file. Returns False, if not available or outdated.
+        """
+        if not os.path.exists(cache_file):
+            return False
+        try:
+            with np.load(cache_file, allow_pickle=False) as arrays:
+                if json.loads(str(arrays['paths'])) != self.paths or not np.array_equal(arrays['mtimes'], mtimes):
+                    logging.info('Icon atlas ' + cache_file + ' is outdated')
+                    return False
+                self.icons = arrays['icons']
+                self.sizes = arrays['sizes']
+            return True
+        except Exception:
+            logging.warning('Failed to load icon atlas from ' + cache_file)
+            return False
+
+    def save(self, cache_file, mtimes):
+        """
+        Saves the atlas to a file (written atomically)
+        """
+        try:
+            temp_path = cache_file + '.tmp'
+            with open(temp_path, 'wb') as f:
+                np.savez(f, paths=np.array(json.dumps(self.paths)), mtimes=mtimes, icons=self.icons, sizes=self.sizes)
+            os.replace(temp_path, cache_file)
+        except Exception:
+            logging.warning('Failed to save icon atlas to ' + cache_file)
@@ -0,0 +1,99 @@
+import bisect
+import collections
+import time
+
+
+class histogram:
+    """
+    Histogram of durations (in seconds) with a fixed number of logarithmically spaced buckets.
+    Adding a value costs a single bisection, memory usage does not grow over time.
+    """
+
+    def __init__(self, min_value=1e-5, max_value=10.0, num_of_buckets=30):
+        ratio = (max_value / min_value) ** (1.0 / (num_of_buckets - 1))
+        self.bounds = [min_value * ratio ** i for i in range(num_of_buckets)]
+        self.counts = [0] * (num_of_buckets + 1)  # last bucket: larger than max_value
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percentage):
+        """
+        Returns the upper bound of the bucket holding the given percentile
+        """
+        if self.count == 0:
+            return 0.0
+        threshold = self.count * percentage / 100.0
+        accumulated = 0
+        for bound, count in zip(self.bounds, self.counts):
+            accumulated += count
+            if accumulated >= threshold:
+                return bound
+        return self.max
+
+    def asdict(self):
+        return {
+            'count': self.count,
+            'mean_ms': 1000.0 * self.sum / self.count if self.count else 0.0,
+            'max_ms': 1000.0 * self.max,
+            'p50_ms': 1000.0 * self.percentile(50),
+            'p90_ms': 1000.0 * self.percentile(90),
+            'p99_ms': 1000.0 * self.percentile(99),
+            'buckets': [{'le_ms': 1000.0 * bound, 'count': count}
+                        for bound, count in zip(self.bounds + [float('inf')], list(self.counts)) if count],
+        }
+
+
+class wordclock_metrics:
+    """
+    Instrumentation of the render pipeline: Durations of each render stage, frame-to-frame
+    intervals and the number of frames rendered per plugin.
+    If disabled, callers check the enabled-flag before taking any timestamps.
+    """
+
+    STAGES = ['composite', 'wiring', 'brightness', 'diff', 'strip_update', 'strip_show']
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.stages = {stage: histogram() for stage in self.STAGES}
+        self.frame_interval = histogram()
+        self.frames_per_plugin = collections.Counter()
+        self.plugin = None
+        self.last_frame = None
+
+    @staticmethod
+    def timestamp():
+        return time.perf_counter()
+
+    def setPlugin(self, plugin):
+        """
+        Sets the name of the plugin, which renders the upcoming frames
+        """
+        self.plugin = plugin
+
+    def addStage(self, stage, duration):
+        self.stages[stage].add(duration)
+
+    def addFrame(self, timestamp):
+        """
+        Records a frame, which was pushed to the strip at the given timestamp
+        """
+        if self.last_frame is not None:
+            self.frame_interval.add(timestamp - self.last_frame)
+        self.last_frame = timestamp
+        self.frames_per_plugin[self.plugin] += 1
+
+    def asdict(self):
+        return {
+            'enabled': self.enabled,
+            'stages': {stage: self.stages[stage].asdict() for stage in self.STAGES},
+            'frame_interval': self.frame_interval.asdict(),
+            'frames_per_plugin': {str(plugin): count for plugin, count in list(self.frames_per_plugin.items())},
+        }
@@ -0,0 +1,163 @@
+import datetime
+import logging
+import threading
+from monotonic import monotonic as _time
+import wordclock_tools.wordclock_screen as wordclock_screen
+
+
+class wordclock_overlay:
+    """
+    Overlay layer of the wordclock display, which scrolls text above whatever the current plugin renders.
+    The overlay is driven by its own timer thread and composited by the renderer, so starting a text
+    returns immediately. Texts can be scheduled to start at a given time and to repeat.
+    """
+
+    def __init__(self, wcd):
+        self.wcd = wcd
+        self.condition = threading.Condition()
+        self.screen = wordclock_screen.wordclock_screen(wcd)
+
+        # Currently scrolling text: precomposed strip, background and frames as (offset, duration)
+        self.strip = None
+        self.bg_color = None
+        self.frames = None
+        self.frame_index = 0
+        self.next_frame = 0.0
+
+        # Scheduled text
+        self.schedule_enabled = False
+        self.schedule_text = ''
+        self.schedule_start = None
+        self.schedule_repeat = 0
+
+        self.thread = threading.Thread(target=self.run, name='wordclock_overlay')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def showText(self, text, font=None, fg_color=None, bg_color=None, fps=10, count=1):
+        """
+        Starts scrolling a text (replacing any currently scrolling one) and returns immediately
+        """
+        if fg_color is None:
+            fg_color = self.wcd.default_fg_color
+        if bg_color is None:
+            bg_color = self.wcd.default_bg_color
+        strip = self.wcd.renderTextStrip('    ' + text + '    ', font, fg_color, bg_color)
+
+        # As wordclock_display.showText: Show the first frame for 0.5 seconds, then shift the text to show all
+        frames = [(0, 0.5)] + [(offset, 1.0 / fps) for offset in range(len(strip) - self.wcd.get_wca_width() + 1)]
+        with self.condition:
+            self.strip = strip
+            self.bg_color = bg_color.rgb()
+            self.frames = frames * count
+            self.frame_index = 0
+            self.next_frame = _time() + self.frames[0][1]
+            self.condition.notify()
+        self.wcd.refresh()
+
+    def scheduleText(self, text, start, repeat=0, enabled=True):
+        """
+        Schedules a text to be shown at start (datetime or None) and then every repeat seconds
+        (0: continuously, i.e. right after the text has been shown)
+        """
+        with self.condition:
+            self.schedule_enabled = enabled
+            self.schedule_text = text
+            self.schedule_start = start
+            self.schedule_repeat = repeat
+            self.condition.notify()
+
+    def getSchedule(self):
+        with self.condition:
+            return {'enabled': self.schedule_enabled,
+                    'text': self.schedule_text,
+                    'start': self.schedule_start,
+                    'repeat': self.schedule_repeat}
+
+    def isActive(self):
+        """
+        Returns True, while a text is scrolling
+        """
+        with self.condition:
+            return self.frames is not None
+
+    def composite(self, screen):
+        """
+        Returns the screen with the current frame of the scrolling text on top. Called by the renderer only.
+        """
+        with self.condition:
+            if self.frames is None:
+                return screen
+            offset = self.frames[self.frame_index][0]
+            window = self.strip[offset:offset + self.wcd.get_wca_width()]
+            self.screen.buffer[:] = screen.buffer
+            self.screen.matrix[:, :] = self.bg_color
+            self.screen.matrix[:len(window), :window.shape[1]] = window
+            return self.screen
+
+    def run(self):
+        while True:
+            try:
+                with self.condition:
+                    while True:
+                        text = self.nextScheduledText()
+                        if text is not None or self.advance():
+                            break
+                        self.condition.wait(self.timeout())
+                # Render outside the lock: The renderer calls composite()
+                if text is not None:
+                    logging.info('Showing scheduled text "' + text + '"')
+                    self.showText(text)
+                else:
+                    self.wcd.refresh()
+            except Exception:
+                # Keep the overlay running (e.g. if a text fails to render), but do not retry the schedule
+                logging.exception('Error in overlay: Disabling the scheduled text')
+                with self.condition:
+                    self.schedule_enabled = False
+
+    def nextScheduledText(self):
+        """
+        Returns the scheduled text, if due (and no other text is scrolling), else None
+        Needs to be called with the condition acquired.
+        """
+        if self.frames is not None or not self.schedule_enabled or self.schedule_start is None:
+            return None
+        now = datetime.datetime.now()
+        if now < self.schedule_start:
+            return None
+        if self.schedule_repeat > 0:
+            # Skip repetitions, which have been missed (in one step: The start may be far in the past)
+            missed = int((now - self.schedule_start).total_seconds() // self.schedule_repeat) + 1
+            self.schedule_start += missed * datetime.timedelta(seconds=self.schedule_repeat)
+        # Else (repeat 0) the text is due again, as soon as it has been shown: It scrolls continuously
+        return self.schedule_text
+
+    def advance(self):
+        """
+        Advances the scrolling text to its next frame, if due. Returns True, if the overlay changed.
+        Needs to be called with the condition acquired.
+        """
+        if self.frames is None:
+            return False
+        now = _time()
+        if now < self.next_frame:
+            return False
+        self.frame_index += 1
+        if self.frame_index == len(self.frames):
+            self.strip = None
+            self.frames = None
+        else:
+            self.next_frame = max(self.next_frame + self.frames[self.frame_index][1], now)
+        return True
+
+    def timeout(self):
+        """
+        Returns the time to wait for the next change of the overlay (None: wait until notified)
+        Needs to be called with the condition acquired.
+        """
+        if self.frames is not None:
+            return max(self.next_frame - _time(), 0.0)
+        if self.schedule_enabled and self.schedule_start is not None:
+            return max((self.schedule_start - datetime.datetime.now()).total_seconds(), 0.0)
+        return None
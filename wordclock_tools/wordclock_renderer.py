@@ -0,0 +1,170 @@
+import collections
+import logging
+import threading
+import time
+from monotonic import monotonic as _time
+import wordclock_tools.wordclock_screen as wordclock_screen
+import wordclock_tools.wordclock_transitions as wordclock_transitions
+
+
+class wordclock_renderer:
+    """
+    Render loop, which owns the strip of the wordclock display.
+    Frames and transitions are submitted to a bounded queue and rendered by a dedicated
+    thread, paced to a target fps using deadline scheduling. Plugins never block on LED I/O.
+    If threaded is False, submitted jobs are rendered immediately within the caller's thread.
+    """
+
+    JOB_FRAME = 0
+    JOB_TRANSITION = 1
+
+    # Placeholder for the front buffer, which is resolved when rendering (see render_transition_step):
+    # Resolved earlier, the buffer could have been recycled as back buffer meanwhile.
+    FRONT_BUFFER = None
+
+    def __init__(self, wcd, fps, threaded=True, queue_size=4):
+        self.wcd = wcd
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.threaded = threaded
+        self.queue_size = queue_size
+
+        self.jobs = collections.deque()
+        self.condition = threading.Condition()
+
+        # Preallocated screens to hold source and target of queued transitions (+ the running one)
+        self.screen_pool = [wordclock_screen.wordclock_screen(wcd) for _ in range(2 * (queue_size + 1))]
+
+        # Instances of all registered transitions (see wordclock_transitions), selectable by name
+        self.transitions = {name: transition(wcd) for name, transition in wordclock_transitions.transitions.items()}
+
+        # Statistics
+        self.deadline = _time()
+        self.frames_dropped = 0
+        self.frames_coalesced = 0
+        self.jitter_count = 0
+        self.jitter_sum = 0.0
+        self.jitter_max = 0.0
+
+        if self.threaded:
+            self.thread = threading.Thread(target=self.run, name='wordclock_renderer')
+            self.thread.daemon = True
+            self.thread.start()
+        logging.info('Renderer running ' + ('in a dedicated thread' if threaded else 'synchronously') +
+                     ' at ' + (str(fps) + ' fps' if fps > 0 else 'unlimited fps'))
+
+    def submitFrame(self):
+        """
+        Requests to render the wordclock display's current front buffer
+        """
+        self.submit((self.JOB_FRAME,))
+
+    def createTransition(self, name, source, target, speed):
+        """
+        Returns a job for a transition from source to target screen, to be submitted.
+        Both screens are copied, so the caller may continue drawing right away.
+        """
+        with self.condition:
+            if len(self.screen_pool) < 2:
+                self.dropOldestJob()
+            source_copy = self.screen_pool.pop()
+            target_copy = self.screen_pool.pop()
+        source_copy.buffer[:] = source.buffer
+        target_copy.buffer[:] = target.buffer
+        return (self.JOB_TRANSITION, name, source_copy, target_copy, speed)
+
+    def submit(self, job):
+        """
+        Queues a job to be rendered (or renders it right away, if not threaded)
+        """
+        if not self.threaded:
+            self.execute(job)
+            return
+        with self.condition:
+            if job[0] == self.JOB_FRAME and self.jobs and self.jobs[-1][0] == self.JOB_FRAME:
+                # A frame is already pending, which will render the most recent content anyway
+                self.frames_coalesced += 1
+                return
+            if len(self.jobs) >= self.queue_size:
+                self.dropOldestJob()
+            self.jobs.append(job)
+            self.condition.notify()
+
+    def dropOldestJob(self):
+        """
+        Drops the oldest (stale) job of the queue. Needs to be called with the condition acquired.
+        """
+        if not self.jobs:
+            return
+        job = self.jobs.popleft()
+        if job[0] == self.JOB_TRANSITION:
+            self.screen_pool.extend(job[2:4])
+        self.frames_dropped += 1
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.jobs:
+                    self.condition.wait()
+                job = self.jobs.popleft()
+            try:
+                self.execute(job)
+            except:
+                logging.exception('Failed to render frame')
+
+    def execute(self, job):
+        # Do not catch up on deadlines missed while being idle
+        self.deadline = max(self.deadline, _time())
+
+        if job[0] == self.JOB_FRAME:
+            if self.threaded:
+                self.renderAtDeadline(self.FRONT_BUFFER, self.interval)
+            else:
+                self.wcd.render_transition_step(self.FRONT_BUFFER)
+            return
+
+        _, name, source, target, speed = job
+        metrics = self.wcd.metrics
+        steps = self.transitions[name].steps(source, target, speed)
+        while True:
+            # Each step of the transition is composited when advancing the generator
+            if metrics.enabled: t_start = metrics.timestamp()
+            step = next(steps, None)
+            if step is None:
+                break
+            if metrics.enabled: metrics.addStage('composite', metrics.timestamp() - t_start)
+            screen, duration = step
+            if self.threaded and _time() - self.deadline > self.interval + duration:
+                # Renderer fell behind: drop this (stale) step of the transition
+                self.deadline += duration
+                self.frames_dropped += 1
+                continue
+            self.renderAtDeadline(screen, duration)
+        # Assure the final state is rendered, even if the last step was dropped
+        self.wcd.render_transition_step(target)
+        with self.condition:
+            self.screen_pool.extend((source, target))
+
+    def renderAtDeadline(self, screen, duration):
+        """
+        Waits for the current deadline, renders the screen and schedules the next deadline
+        after the given duration
+        """
+        if self.threaded:
+            wait = self.deadline - _time()
+            if wait > 0:
+                time.sleep(wait)
+            jitter = _time() - self.deadline
+            self.jitter_count += 1
+            self.jitter_sum += jitter
+            self.jitter_max = max(self.jitter_max, jitter)
+            self.wcd.render_transition_step(screen)
+            self.deadline += max(duration, self.interval)
+        else:
+            self.wcd.render_transition_step(screen)
+            time.sleep(duration)
+
+    def getStatistics(self):
+        return {'frames_dropped': self.frames_dropped,
+                'frames_coalesced': self.frames_coalesced,
+                'jitter_mean_ms': 1000.0 * self.jitter_sum / self.jitter_count if self.jitter_count else 0.0,
+                'jitter_max_ms': 1000.0 * self.jitter_max}
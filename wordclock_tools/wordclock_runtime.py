@@ -0,0 +1,160 @@
+import asyncio
+import concurrent.futures
+import inspect
+import logging
+import wordclock_interfaces.event_handler as wci
+
+
+class async_event_handler:
+    """
+    The event handler as passed to coroutine plugins: waitForEvent and waitForExit are coroutines,
+    which suspend the plugin (instead of blocking a thread) until an event arrives.
+    Everything else is forwarded to the (synchronous) event handler.
+    """
+
+    def __init__(self, evtHandler):
+        self.evtHandler = evtHandler
+        # Bound to the event loop of the first waiting coroutine (each run of a plugin may use its own loop)
+        self.loop = None
+        self.changed = None
+        evtHandler.addListener(self.wake)
+
+    def __getattr__(self, name):
+        return getattr(self.evtHandler, name)
+
+    def wake(self):
+        loop, changed = self.loop, self.changed
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(changed.set)
+        except RuntimeError:
+            pass  # The loop has been closed meanwhile
+
+    async def waitForEvent(self, seconds=None):
+        return await self.wait(self.evtHandler.waitForEvent, self.EVENT_INVALID, seconds)
+
+    async def waitForExit(self, seconds=None):
+        return await self.wait(self.evtHandler.waitForExit, False, seconds)
+
+    async def wait(self, function, nothing, seconds):
+        """
+        Polls function without blocking, until it returns anything else but nothing or seconds have passed
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self.loop:
+            self.changed = asyncio.Event()
+            self.loop = loop
+        deadline = None if seconds is None else loop.time() + seconds
+        while True:
+            self.changed.clear()
+            result = function(0)
+            if result != nothing:
+                return result
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return result
+            try:
+                await asyncio.wait_for(self.changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+
+def add_timer(interval, callback):
+    """
+    Calls callback (a function or coroutine function) every interval seconds on the running event loop,
+    paced by deadlines. Returns the task, to be cancelled to stop the timer.
+    """
+    async def timer():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while True:
+            try:
+                result = callback()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logging.exception('Error in timer ' + str(callback))
+            deadline += interval
+            await asyncio.sleep(max(deadline - loop.time(), 0))
+
+    return asyncio.get_running_loop().create_task(timer())
+
+
+async def run_blocking(function, *args):
+    """
+    Runs a blocking function (e.g. a network fetch or reading a sensor) in a worker thread
+    and returns its result, without blocking the event loop
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+
+async def show(wcd, animation=None, animation_speed=5):
+    """
+    Shows the back buffer of the display (see wordclock_display.show) without blocking the event loop:
+    Unless the renderer runs in its own thread, rendering (and any transition) is done within a worker thread
+    """
+    if wcd.renderer.threaded:
+        wcd.show(animation, animation_speed)
+    else:
+        await run_blocking(wcd.show, animation, animation_speed)
+
+
+class wordclock_runtime:
+    """
+    Runs the wordclock on a single asyncio event loop: Coroutine plugins and their timers share the loop.
+    Plugins with a synchronous run(wcd, wci) (and the menu) run one after another within a single worker thread.
+    The web interface is served by its (werkzeug) server within a worker thread of the loop, so slow requests
+    never stall the loop.
+    """
+
+    def __init__(self, wordclock):
+        self.wordclock = wordclock
+        self.loop = None
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='wordclock_plugin')
+
+    def run(self):
+        asyncio.run(self.main())
+
+    async def main(self):
+        self.loop = asyncio.get_running_loop()
+        self.loop.run_in_executor(None, self.wordclock.wciweb.threaded_app)
+        logging.info('Running on an asyncio event loop')
+
+        await self.runSync(self.wordclock.startup)
+
+        # As wordclock.run
+        self.wordclock.plugin_index = self.wordclock.default_plugin
+        while True:
+            await self.runPlugin()
+            if self.wordclock.wci.nextAction == wci.next_action.RUN_DEFAULT_PLUGIN:
+                self.wordclock.plugin_index = self.wordclock.default_plugin
+            elif self.wordclock.wci.nextAction == wci.next_action.GOTO_MENU:
+                await self.runSync(self.wordclock.runMenu)
+
+    async def runSync(self, function, *args):
+        """
+        Runs a synchronous function (e.g. a plugin's run) within the worker thread
+        """
+        return await self.loop.run_in_executor(self.executor, function, *args)
+
+    async def runPlugin(self):
+        """
+        Runs the currently selected plugin: Coroutine plugins on the event loop, others within the worker thread
+        """
+        wordclock = self.wordclock
+        plugin = wordclock.plugins[wordclock.plugin_index]
+        if not inspect.iscoroutinefunction(plugin.run):
+            await self.runSync(wordclock.runPlugin)
+            return
+
+        try:
+            logging.info('Running plugin ' + plugin.name + '.')
+            wordclock.wcd.metrics.setPlugin(plugin.name)
+            await plugin.run(wordclock.wcd, wordclock.async_wci)
+        except Exception:
+            wordclock.reportPluginError()
+            raise
+
+        # Cleanup display after exiting plugin
+        wordclock.wcd.resetDisplay()
@@ -1,28 +1,26 @@
-
-import wordclock_tools.wordclock_colors as wcc
+import numpy as np
 import logging
 
 class wordclock_screen:
 
     def __init__(self, wcd):
-        self.matrix = [[wcc.BLACK for _ in range(wcd.get_wca_height())] for _ in
-                                      range(wcd.get_wca_width())]
-
-        size = wcd.get_wca_height() * wcd.get_wca_width()
-        rest = wcd.get_led_count() - size
-
-        self.minutes = [wcc.BLACK for _ in range(4)]
-        if rest >= 4: # subtract minutes
-            rest -= 4
+        width = wcd.get_wca_width()
+        height = wcd.get_wca_height()
+        size = height * width
+        rest = len(wcd.wcl.misc_indices)
 
-        self.misc = [wcc.BLACK for _ in range(rest)]
+        # A single contiguous framebuffer, holding the WCA (column by column), the minutes and the misc LEDs.
+        # The members below are views into it: (x, y, rgb) for the WCA, (index, rgb) for minutes and misc LEDs
+        self.buffer = np.zeros((size + 4 + rest, 3), dtype=np.uint8)
+        self.matrix = self.buffer[:size].reshape(width, height, 3)
+        self.minutes = self.buffer[size:size + 4]
+        self.misc = self.buffer[size + 4:]
 
 
     def __sub__(self, other):
         if not isinstance(other, int):
             raise TypeError
 
-        self.minutes = [x - other for x in self.minutes]
-        self.misc    = [x - other for x in self.misc]
-        self.matrix  = [[x - other for x in y] for y in self.matrix]
+        # Saturating subtraction (clamped at 0), applied in place
+        np.subtract(self.buffer, np.minimum(self.buffer, other), out=self.buffer)
         return self
@@ -1,6 +1,15 @@
+import wordclock_tools.wordclock_colors as wcc
 
 class wordclock_strip_base:
     """
     A class, used to select the required led strip.
     """
-    pass
+
+    def setPixelColors(self, indices, colors):
+        """
+        Sets a whole frame at once
+        indices: Strip indices of the leds to be set
+        colors: Array of rgb-values (one row per index)
+        """
+        for index, (r, g, b) in zip(indices, colors.tolist()):
+            self.setPixelColor(index, wcc.Color(r, g, b))
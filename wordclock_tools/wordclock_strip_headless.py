@@ -0,0 +1,78 @@
+import atexit
+import logging
+import numpy as np
+import struct
+import time
+from wordclock_tools.wordclock_strip_base import wordclock_strip_base
+
+# Recording format: A header (magic, version, number of LEDs), followed by one record per pushed frame,
+# holding the timestamp (float64, seconds since epoch) and the rgb-values of all LEDs (in strip order)
+RECORDING_MAGIC = b'WCREC'
+RECORDING_VERSION = 1
+RECORDING_HEADER = struct.Struct('<5sBH')
+RECORDING_TIMESTAMP = struct.Struct('<d')
+
+
+class wordclock_strip_headless(wordclock_strip_base):
+    """
+    A strip without any hardware attached (e.g. for benchmarks or continuous integration).
+    The LED buffer is kept in memory. Optionally, every pushed frame is recorded to a file.
+    """
+
+    def __init__(self, wcl, recording_file=None):
+        self.led_count = wcl.LED_COUNT
+        self.leds = np.zeros((self.led_count, 3), dtype=np.uint8)
+        self.frames_shown = 0
+
+        self.recording = None
+        if recording_file:
+            logging.info('Recording all frames to ' + recording_file)
+            self.recording = open(recording_file, 'wb')
+            self.recording.write(RECORDING_HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION, self.led_count))
+            atexit.register(self.close)
+
+    def begin(self):
+        pass
+
+    def setPixelColor(self, index, color):
+        self.leds[index] = (color.r, color.g, color.b)
+
+    def setPixelColors(self, indices, colors):
+        self.leds[indices] = colors
+
+    def getPixels(self):
+        """
+        Returns the current rgb-values of all LEDs (in strip order)
+        """
+        return self.leds
+
+    def show(self):
+        self.frames_shown += 1
+        if self.recording is not None:
+            self.recording.write(RECORDING_TIMESTAMP.pack(time.time()))
+            self.recording.write(self.leds.tobytes())
+            # Keep the recording usable, even if the process gets killed
+            self.recording.flush()
+
+    def close(self):
+        if self.recording is not None:
+            self.recording.close()
+            self.recording = None
+
+
+def read_recording(recording_file):
+    """
+    Yields (timestamp, frame) of each frame of a recording, where frame holds the rgb-values of all LEDs
+    """
+    with open(recording_file, 'rb') as f:
+        magic, version, led_count = RECORDING_HEADER.unpack(f.read(RECORDING_HEADER.size))
+        if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+            raise Exception('Unsupported recording ' + recording_file)
+        frame_size = 3 * led_count
+        while True:
+            record = f.read(RECORDING_TIMESTAMP.size + frame_size)
+            if len(record) < RECORDING_TIMESTAMP.size + frame_size:
+                return
+            timestamp, = RECORDING_TIMESTAMP.unpack_from(record)
+            frame = np.frombuffer(record, dtype=np.uint8, offset=RECORDING_TIMESTAMP.size).reshape(led_count, 3)
+            yield timestamp, frame
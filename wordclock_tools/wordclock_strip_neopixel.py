@@ -1,5 +1,6 @@
 from rpi_ws281x import Adafruit_NeoPixel, ws
 from rpi_ws281x import Color as NeoPixelColor
+import numpy as np
 import wordclock_tools.wordclock_colors as wcc
 import logging
 
@@ -19,3 +20,12 @@ class wordclock_strip_neopixel(Adafruit_NeoPixel):
         """
         neopixelcolor = NeoPixelColor(color.r, color.g, color.b)
         super(wordclock_strip_neopixel, self).setPixelColor(index, neopixelcolor)
+
+    def setPixelColors(self, indices, colors):
+        """
+        Here we receive a whole frame as array of rgb-values and pack it to NeoPixelColors at once.
+        """
+        colors = colors.astype(np.uint32)
+        neopixelcolors = (colors[:, 0] << 16) | (colors[:, 1] << 8) | colors[:, 2]
+        for index, neopixelcolor in zip(indices, neopixelcolors.tolist()):
+            super(wordclock_strip_neopixel, self).setPixelColor(index, neopixelcolor)
@@ -5,6 +5,7 @@ import os
 import sys
 from wordclock_interfaces import event_handler as weh
 from wordclock_tools.wordclock_colors import Color
+from wordclock_tools.wordclock_strip_base import wordclock_strip_base
 
 import wx
 # in all modules that use pubsub 
@@ -27,11 +28,11 @@ class WxStripWindow(wx.Frame):
     def onKeyPress(self, event=None):
         keycode = event.GetKeyCode()
         if(keycode == wx.WXK_LEFT):
-            self.weh.setEvent(weh.event_handler.EVENT_BUTTON_LEFT)
+            self.weh.setEvent(weh.event_handler.EVENT_BUTTON_LEFT, weh.event_handler.SOURCE_SIMULATOR)
         elif(keycode == wx.WXK_RIGHT):
-            self.weh.setEvent(weh.event_handler.EVENT_BUTTON_RIGHT)
+            self.weh.setEvent(weh.event_handler.EVENT_BUTTON_RIGHT, weh.event_handler.SOURCE_SIMULATOR)
         elif(keycode == wx.WXK_RETURN):
-            self.weh.setEvent(weh.event_handler.EVENT_BUTTON_RETURN)
+            self.weh.setEvent(weh.event_handler.EVENT_BUTTON_RETURN, weh.event_handler.SOURCE_SIMULATOR)
 
     def updateDisplay(self):
         """
@@ -39,7 +40,7 @@ class WxStripWindow(wx.Frame):
         """
         self.Update()
 
-class WxStrip():
+class WxStrip(wordclock_strip_base):
     def __init__(self, weh):        
         self.label = "QTstrip"
         
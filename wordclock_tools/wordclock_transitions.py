@@ -0,0 +1,170 @@
+import math
+import numpy as np
+import wordclock_tools.wordclock_screen as wordclock_screen
+
+
+class base_transition:
+    """
+    A transition interpolates between the current (source) and the next (target) framebuffer.
+    Each step blends both framebuffers using precomputed per-step weight tables (0..256):
+        step = (source * weights_source + target * weights_target) >> 8
+    so every transition costs the same, small amount of work per frame.
+    Child classes provide the weight tables by implementing weights().
+    """
+
+    def __init__(self, wcd):
+        self.wcd = wcd
+        self.scratch = wordclock_screen.wordclock_screen(wcd)
+        self.blend_source = np.zeros(self.scratch.buffer.shape, dtype=np.uint16)
+        self.blend_target = np.zeros(self.scratch.buffer.shape, dtype=np.uint16)
+        self.table_cache = {}
+
+    def num_of_steps(self, speed):
+        """
+        Number of steps of a transition with given speed (in brightness steps per frame)
+        """
+        return max(1, int(math.ceil(255.0 / speed)))
+
+    def frame_duration(self):
+        return 1.0 / self.wcd.fps
+
+    def weights(self, source, target, speed):
+        """
+        Returns the weight tables for source and target, each broadcastable to
+        (steps, num_of_pixels, 1), and the duration of each step in seconds
+        """
+        raise NotImplementedError
+
+    def steps(self, source, target, speed):
+        """
+        Yields the screens of the transition, each with the duration it should be displayed
+        """
+        weights_source, weights_target, duration = self.weights(source, target, speed)
+        for step in range(len(weights_target)):
+            np.multiply(source.buffer, weights_source[step], out=self.blend_source)
+            np.multiply(target.buffer, weights_target[step], out=self.blend_target)
+            self.blend_source += self.blend_target
+            self.blend_source >>= 8
+            self.scratch.buffer[:] = self.blend_source
+            yield self.scratch, duration
+
+    def uniform_table(self, steps, curve):
+        """
+        Returns a cached table of pixel-independent weights, shape (steps, 1, 1)
+        curve: Function mapping the progress t (0 < t <= 1) to a weight in [0, 1]
+        """
+        key = (curve, steps)
+        if key not in self.table_cache:
+            t = np.arange(1, steps + 1) / float(steps)
+            self.table_cache[key] = np.round(256 * np.clip(curve(t), 0, 1)).astype(np.uint16).reshape(steps, 1, 1)
+        return self.table_cache[key]
+
+
+def _fade_in(t):
+    return t
+
+
+def _fade_out(t):
+    return 1 - t
+
+
+def _fade_out_first_half(t):
+    return 1 - 2 * t
+
+
+def _fade_in_second_half(t):
+    return 2 * t - 1
+
+
+class crossfade(base_transition):
+    """
+    Blends linearly from the current to the next screen
+    """
+
+    def weights(self, source, target, speed):
+        steps = self.num_of_steps(speed)
+        return self.uniform_table(steps, _fade_out), self.uniform_table(steps, _fade_in), self.frame_duration()
+
+
+class fadeOutIn(base_transition):
+    """
+    Fades the current screen out and the next screen in
+    """
+
+    def weights(self, source, target, speed):
+        steps = 2 * self.num_of_steps(speed)
+        return self.uniform_table(steps, _fade_out_first_half), self.uniform_table(steps, _fade_in_second_half), \
+               self.frame_duration()
+
+
+class wipe(base_transition):
+    """
+    Wipes the next screen in from left to right
+    """
+
+    def weights(self, source, target, speed):
+        steps = self.num_of_steps(speed)
+        key = ('wipe', steps)
+        if key not in self.table_cache:
+            width, height = self.wcd.get_wca_width(), self.wcd.get_wca_height()
+            # Horizontal position of each pixel within [0, 1]. Minutes and misc LEDs change halfway.
+            position = np.full(len(self.scratch.buffer), 0.5)
+            position[:width * height] = np.repeat(np.arange(width) / float(max(width - 1, 1)), height)
+            # A soft edge of 1/4 of the display moves across it
+            edge = 0.25
+            t = np.arange(1, steps + 1).reshape(steps, 1) / float(steps)
+            weights_target = np.clip((t * (1 + edge) - position) / edge, 0, 1)
+            weights_target = np.round(256 * weights_target).astype(np.uint16)[:, :, np.newaxis]
+            self.table_cache[key] = (256 - weights_target, weights_target)
+        weights_source, weights_target = self.table_cache[key]
+        return weights_source, weights_target, self.frame_duration()
+
+
+class wordMorph(base_transition):
+    """
+    Morphs words: Pixels, which are lit on both screens, blend directly. Pixels switching off
+    fade out during the first half, pixels switching on fade in during the second half.
+    """
+
+    def weights(self, source, target, speed):
+        steps = self.num_of_steps(speed)
+        source_lit = source.buffer.any(axis=1)
+        target_lit = target.buffer.any(axis=1)
+        # Pixel classes: 0 = blend directly, 1 = switching off, 2 = switching on
+        pixel_class = np.where(source_lit & ~target_lit, 1, np.where(~source_lit & target_lit, 2, 0))
+        class_source = np.concatenate((self.uniform_table(steps, _fade_out),
+                                       self.uniform_table(steps, _fade_out_first_half),
+                                       np.zeros((steps, 1, 1), dtype=np.uint16)), axis=2)
+        class_target = np.concatenate((self.uniform_table(steps, _fade_in),
+                                       np.zeros((steps, 1, 1), dtype=np.uint16),
+                                       self.uniform_table(steps, _fade_in_second_half)), axis=2)
+        return class_source[:, 0, pixel_class, np.newaxis], class_target[:, 0, pixel_class, np.newaxis], \
+               self.frame_duration()
+
+
+class typewriter(base_transition):
+    """
+    Types all lit pixels of the next screen one after another (speed: pixels per second)
+    """
+
+    def weights(self, source, target, speed):
+        width, height = self.wcd.get_wca_width(), self.wcd.get_wca_height()
+        # Typing order: row by row within the WCA (the buffer holds the WCA column by column)
+        lit = target.matrix.any(axis=2).T.ravel()
+        order = np.arange(width * height).reshape(width, height).T.ravel()[lit]
+        steps = len(order)
+        rank = np.full(len(self.scratch.buffer), steps)
+        rank[order] = np.arange(steps)
+        weights_target = 256 * (rank[np.newaxis, :] <= np.arange(steps)[:, np.newaxis]).astype(np.uint16)
+        weights_source = np.zeros((steps, 1, 1), dtype=np.uint16)
+        return weights_source, weights_target[:, :, np.newaxis], 1.0 / speed
+
+
+# Registry of all available transitions, selectable by name
+transitions = {
+    'crossfade': crossfade,
+    'fadeOutIn': fadeOutIn,
+    'typewriter': typewriter,
+    'wipe': wipe,
+    'wordMorph': wordMorph,
+}